@@ -0,0 +1,208 @@
+"""This script generates large batches of questions of the multiple choice game
+at once with NumPy, for simulations, deck analysis and exams. It is not
+shipped with the app, which makes its questions one at a time with
+questions.make_question.
+"""
+
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from senses import split_senses
+
+
+###############################################################################
+# deck as arrays
+
+class DeckArrays(NamedTuple):
+    """Entries of a game as integer arrays."""
+    # ids of the entries of the game
+    pool: np.ndarray
+    # for each side (0 for the danish words and 1 for the translations), the
+    # position in the pool of one entry of each distinct answer
+    answers: Tuple[np.ndarray, np.ndarray]
+    # for each side, the position in answers of the answer of each entry
+    ranks: Tuple[np.ndarray, np.ndarray]
+    # ids of the senses of the translation of each entry, padded with -1, or
+    # None if synonyms are not rejected
+    senses: Optional[np.ndarray] = None
+
+
+def deck_arrays(pool: Sequence[int], store, senses: bool=True) -> DeckArrays:
+    """Converts the entries [pool] of a vocabulary store into arrays. As in
+    sampling.DistractorSampler, each distinct answer is represented by the
+    first entry of the pool that has it.
+
+    Args:
+        pool: ids of the entries of the game
+        store: storage engine of the vocabulary
+        senses (optional): if the senses of the translations are kept, so
+            that synonyms of the question are rejected as the app does with
+            its sense index. Defaults to True.
+
+    Returns:
+        arrays of the game
+    """
+
+    answers, ranks = [], []
+    for side in (0, 1):
+        keys = {}
+        codes = np.fromiter((keys.setdefault(store.answer_key(entry_id, side),
+                                                len(keys))
+                                for entry_id in pool), np.int64, len(pool))
+        _, first, inverse = np.unique(codes, return_index=True,
+                                        return_inverse=True)
+        answers.append(first)
+        ranks.append(inverse.reshape(-1))
+
+    sense_ids = None
+    if senses:
+        ids = {}
+        entry_senses = [[ids.setdefault(sense, len(ids)) for sense in
+                            split_senses(store.entry(entry_id)[1])]
+                        for entry_id in pool]
+        width = max(map(len, entry_senses), default=0)
+        sense_ids = np.full((len(pool), max(width, 1)), -1, np.int64)
+        for position, entry in enumerate(entry_senses):
+            sense_ids[position, :len(entry)] = entry
+    return DeckArrays(np.asarray(pool, np.int64), tuple(answers), tuple(ranks),
+                        sense_ids)
+
+
+###############################################################################
+# batches
+
+def draw_answers(rng: np.random.Generator, correct: np.ndarray,
+                    n_answers: np.ndarray, draws: int) -> np.ndarray:
+    """Draws [draws] answers for each question, uniformly without replacement
+    among the answers of its side other than its own answer [correct].
+
+    Args:
+        rng: random generator
+        correct: position of the answer of each question among the answers
+            of its side
+        n_answers: number of answers of the side of each question
+        draws: number of answers drawn for each question
+
+    Returns:
+        positions of the answers drawn, in the order they were drawn, with
+            shape (questions, draws) and -1 once the answers run out
+    """
+
+    size = len(correct)
+    # j-th draw among the answers not chosen yet, shifted past the chosen
+    # answers in increasing order, which is a uniform draw without
+    # replacement and where the answer of the question counts as chosen
+    chosen = correct[:, None]
+    ranks = np.full((size, draws), -1, np.int64)
+    for j in range(draws):
+        remaining = n_answers - 1 - j
+        valid = remaining > 0
+        rank = np.floor(rng.random(size) * np.maximum(remaining, 1)).astype(
+                                                                    np.int64)
+        for column in range(chosen.shape[1]):
+            rank += rank >= chosen[:, column]
+        ranks[:, j] = np.where(valid, rank, -1)
+        chosen = np.sort(np.column_stack((chosen, np.where(valid, rank,
+                                                    np.iinfo(np.int64).max))),
+                            axis=1)
+    return ranks
+
+
+def synonyms(senses: np.ndarray, questions: np.ndarray,
+                positions: np.ndarray) -> np.ndarray:
+    """Checks which entries share a sense with the entry of their question.
+
+    Args:
+        senses: ids of the senses of each entry of the pool, padded with -1
+        questions: positions in the pool of the entries asked
+        positions: positions in the pool of the entries compared with the
+            entry of each question, with one row per question
+
+    Returns:
+        True where the entry is a synonym of the entry of its question
+    """
+
+    asked = senses[questions][:, None, :, None]
+    other = senses[positions][:, :, None, :]
+    return ((asked == other) & (asked >= 0)).any(axis=(2, 3))
+
+
+def batch_questions(arrays: DeckArrays, size: int, k: int=3, seed=None,
+                    replace: bool=True
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Generates [size] questions with [k] wrong options each in one call.
+    The wrong options of a question have distinct answers, different from
+    the answer of the question, drawn uniformly without replacement, as
+    sampling.DistractorSampler does. If the arrays have the senses of the
+    entries, the synonyms of the question are skipped like the sampler of
+    the app does: 2k answers are drawn for every question and the first k
+    that are not synonyms are kept, and the few questions where that is not
+    enough draw the rest of their answers one question at a time.
+
+    Args:
+        arrays: arrays of the game
+        size: number of questions
+        k (optional): number of wrong options. Defaults to 3.
+        seed (optional): seed of the random generator, so that a batch can be
+            generated again. Defaults to None.
+        replace (optional): if the same entry can be asked more than once,
+            which exams forbid. Defaults to True.
+
+    Returns:
+        ids of the entries asked, directions (1 if the question is a danish
+            word and 0 if it is a translation) and ids of the wrong options,
+            with shape (size, k) and -1 where the pool does not have enough
+            different answers
+
+    Requires:
+        replace is True or size is at most the size of the pool
+    """
+
+    rng = np.random.default_rng(seed)
+    questions = rng.choice(len(arrays.pool), size, replace=replace)
+    directions = rng.integers(0, 2, size)
+    is_translation = directions == 1
+
+    n_answers = np.where(is_translation, len(arrays.answers[1]),
+                            len(arrays.answers[0]))
+    correct = np.where(is_translation, arrays.ranks[1][questions],
+                        arrays.ranks[0][questions])
+
+    def pool_positions(ranks: np.ndarray, rows=slice(None)) -> np.ndarray:
+        return np.where(is_translation[rows, None],
+                        arrays.answers[1][np.clip(ranks, 0,
+                                            len(arrays.answers[1]) - 1)],
+                        arrays.answers[0][np.clip(ranks, 0,
+                                            len(arrays.answers[0]) - 1)])
+
+    if arrays.senses is None:
+        ranks = draw_answers(rng, correct, n_answers, k)
+    else:
+        draws = 2 * k
+        drawn = draw_answers(rng, correct, n_answers, draws)
+        kept = (drawn >= 0) & ~synonyms(arrays.senses, questions,
+                                        pool_positions(drawn))
+        # the first k answers kept, in the order they were drawn
+        order = np.argsort(~kept, axis=1, kind='stable')[:, :k]
+        ranks = np.where(np.take_along_axis(kept, order, axis=1),
+                            np.take_along_axis(drawn, order, axis=1), -1)
+
+        for row in np.flatnonzero((kept.sum(axis=1) < k) &
+                                    (n_answers - 1 > draws)):
+            rest = np.setdiff1d(np.arange(n_answers[row]),
+                                np.append(drawn[row], correct[row]))
+            rest = rng.permutation(rest)
+            found = ranks[row][ranks[row] >= 0].tolist()
+            for start in range(0, len(rest), draws):
+                chunk = rest[start:start + draws]
+                similar = synonyms(arrays.senses, questions[row:row + 1],
+                                    pool_positions(chunk[None, :],
+                                                    slice(row, row + 1)))[0]
+                found.extend(chunk[~similar][:k - len(found)].tolist())
+                if len(found) == k:
+                    break
+            ranks[row] = found + [-1] * (k - len(found))
+
+    distractors = np.where(ranks >= 0, arrays.pool[pool_positions(ranks)], -1)
+    return arrays.pool[questions], directions, distractors
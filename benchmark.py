@@ -0,0 +1,849 @@
+"""This script measures the performance of the mechanisms of the application
+on synthetic decks. It is not shipped with the app.
+
+Usage:
+    python benchmark.py [benchmark ...]
+"""
+
+import os
+import json
+import sys
+import time
+import random
+import statistics
+import tempfile
+import tracemalloc
+from typing import Callable, List
+
+import deck
+import importer
+import questions
+import quiz
+import reviewlog
+import sampling
+import scheduler
+import session
+import senses
+import vocabulary
+
+
+###############################################################################
+# synthetic data and timing helpers
+
+def synthetic_words(filename: str, n_lines: int, n_groups: int=50,
+                    seed: int=0):
+    """Writes a synthetic words file with [n_lines] distinct entries spread
+    over [n_groups] vocabulary groups.
+
+    Args:
+        filename: name of the words file to write
+        n_lines: number of lines of the file
+        n_groups (optional): number of vocabulary groups. Defaults to 50.
+        seed (optional): seed of the random generator. Defaults to 0.
+    """
+
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyzæøå"
+    with open(filename, 'w', encoding='utf8') as datafile:
+        for i in range(n_lines):
+            word = "".join(rng.choice(letters) for _ in range(6)) + str(i)
+            meaning = f"to {word[::-1]}; meaning {i % 997}"
+            datafile.write(f"{word}#{meaning}#Group {i % n_groups}\n")
+
+
+def measure(function: Callable, repeat: int=5) -> List[float]:
+    """Times [repeat] calls of [function].
+
+    Args:
+        function: function without arguments to time
+        repeat (optional): number of calls. Defaults to 5.
+
+    Returns:
+        duration of each call in seconds
+    """
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name: str, durations: List[float]):
+    """Prints the best and median duration of a measurement.
+
+    Args:
+        name: name of the measurement
+        durations: durations of the measurement in seconds
+    """
+
+    print(f"  {name:<32} best {min(durations)*1000:9.2f} ms   "
+            f"median {statistics.median(durations)*1000:9.2f} ms")
+
+
+###############################################################################
+# benchmarks
+
+def bench_startup(n_lines: int=200_000):
+    """Compares the start-up load of a words file parsed from text against
+    the load of its compiled deck.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 200000.
+    """
+
+    print(f"startup load of a {n_lines} line deck")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        target = deck.deck_path(source)
+
+        report("parse words file", measure(lambda: deck.find_words(source)))
+        report("compile deck", measure(lambda: deck.write_deck(
+                [deck.compile_words(source)], target), repeat=1))
+        report("open compiled deck", measure(
+                lambda: deck.load_words(source, target)))
+        report("select every group of the deck", measure(
+                lambda: deck.load_words(source, target).select(
+                    deck.load_words(source, target).groups())))
+        print(f"  words file {os.path.getsize(source)/1e6:.1f} MB, "
+                f"deck {os.path.getsize(target)/1e6:.1f} MB")
+
+
+def bench_storage(n_lines: int=200_000, draws: int=10_000):
+    """Compares the storage engines when opening the vocabulary, selecting
+    every group and drawing a question and three distractors [draws] times.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 200000.
+        draws (optional): number of questions drawn. Defaults to 10000.
+    """
+
+    print(f"storage engines on a {n_lines} line deck ({draws} questions)")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        for engine in ("deck", "sqlite"):
+            store = deck.open_store(source, engine)
+            report(f"{engine}: open", measure(
+                    lambda: deck.open_store(source, engine)))
+            pool = store.select(store.groups())
+            report(f"{engine}: select all groups", measure(
+                    lambda: store.select(store.groups())))
+            report(f"{engine}: draw questions", measure(
+                    lambda: [store.entry(random.choice(pool))
+                                for _ in range(4*draws)]))
+
+
+def bench_menu(sizes: tuple=(20_000, 200_000, 2_000_000)):
+    """Measures the time to open the compiled deck and list its groups, which
+    is what the vocabulary menu needs, for decks of increasing [sizes].
+
+    Args:
+        sizes (optional): number of lines of the synthetic words files.
+            Defaults to (20000, 200000, 2000000).
+    """
+
+    print("vocabulary menu from the deck index")
+    with tempfile.TemporaryDirectory() as directory:
+        for n_lines in sizes:
+            source = os.path.join(directory, f"words_{n_lines}.txt")
+            synthetic_words(source, n_lines)
+            store = deck.open_store(source)
+            report(f"{n_lines} lines: open and list", measure(
+                    lambda: deck.open_store(source).groups()))
+            report(f"{n_lines} lines: select one group", measure(
+                    lambda: deck.open_store(source).select(
+                                                    store.groups()[:1])))
+
+
+def traced(function: Callable) -> tuple:
+    """Calls [function] while tracing the memory allocated by Python.
+
+    Args:
+        function: function without arguments to call
+
+    Returns:
+        the result of the call and the memory it keeps allocated, in bytes
+    """
+
+    tracemalloc.start()
+    try:
+        result = function()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def bench_memory(sizes: tuple=(10_000, 100_000, 1_000_000)):
+    """Reports the memory used by the vocabulary with every group selected,
+    as sets of tuples of strings (find_words) and as a compiled deck of ids.
+    The pages of a mapped deck belong to the page cache and are not traced,
+    so the size of the deck file is reported alongside.
+
+    Args:
+        sizes (optional): number of lines of the synthetic words files.
+            Defaults to (10000, 100000, 1000000).
+    """
+
+    print("memory of the vocabulary with every group selected")
+    with tempfile.TemporaryDirectory() as directory:
+        for n_lines in sizes:
+            source = os.path.join(directory, f"words_{n_lines}.txt")
+            synthetic_words(source, n_lines)
+
+            def tuples():
+                vocab_groups = deck.find_words(source)
+                vocab_to_use = set()
+                for group in vocab_groups:
+                    vocab_to_use |= vocab_groups[group]
+                return vocab_groups, list(vocab_to_use)
+
+            def ids():
+                store = deck.load_words(source)
+                return store, store.select(store.groups())
+
+            _, tuples_size = traced(tuples)
+            deck.load_words(source)
+            _, ids_size = traced(ids)
+            print(f"  {n_lines:>8} lines: tuples {tuples_size/1e6:8.1f} MB   "
+                    f"deck {ids_size/1e6:8.1f} MB + "
+                    f"{os.path.getsize(deck.deck_path(source))/1e6:.1f} MB "
+                    f"mapped")
+
+
+def bench_union(n_lines: int=1_000_000):
+    """Measures the selection of every group of the deck, the first time
+    (bitsets built and OR-ed) and again with the same choice (memoized).
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 1000000.
+    """
+
+    print(f"union of every group of a {n_lines} line deck")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        deck.load_words(source)
+
+        def first_union():
+            store = deck.load_words(source)
+            store.select(store.groups())
+
+        store = deck.load_words(source)
+        store.select(store.groups())
+        report("first selection", measure(first_union))
+        report("same selection again", measure(
+                lambda: store.select(store.groups())))
+
+
+def bench_reload(n_lines: int=200_000, edits: tuple=(1, 10, 100)):
+    """Measures the reload of the words file after [edits] consecutive lines
+    are replaced in the middle of a deck with every group selected.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 200000.
+        edits (optional): numbers of lines replaced. Defaults to
+            (1, 10, 100).
+    """
+
+    print(f"reload of a {n_lines} line deck")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        with open(source, encoding='utf8') as datafile:
+            lines = datafile.readlines()
+        store = deck.load_words(source)
+        store.select(store.groups())
+        watcher = vocabulary.WordsWatcher(source)
+
+        for n_edits in edits:
+            middle = n_lines // 2
+            for i in range(middle, middle + n_edits):
+                lines[i] = f"edited{i}#{n_edits}#Group {i % 7}\n"
+            with open(source, 'w', encoding='utf8') as datafile:
+                datafile.writelines(lines)
+            os.utime(source, ns=(0, n_edits))
+
+            start = time.perf_counter()
+            store.apply(*watcher.poll())
+            store.select(store.groups())
+            report(f"{n_edits} lines changed", [time.perf_counter() - start])
+
+
+def bench_directory(n_files: int=8, n_lines: int=100_000):
+    """Compares the compilation of a directory of words files one after the
+    other and with a pool of processes.
+
+    Args:
+        n_files (optional): number of words files. Defaults to 8.
+        n_lines (optional): number of lines of each file. Defaults to 100000.
+    """
+
+    print(f"directory of {n_files} decks of {n_lines} lines "
+            f"({os.cpu_count()} processors)")
+    with tempfile.TemporaryDirectory() as directory:
+        for number in range(n_files):
+            synthetic_words(os.path.join(directory, f"deck{number}.txt"),
+                            n_lines, seed=number)
+
+        def remove_decks():
+            for name in os.listdir(directory):
+                if name.endswith(".deck"):
+                    os.remove(os.path.join(directory, name))
+
+        for workers in (1, None):
+            durations = []
+            for _ in range(3):
+                remove_decks()
+                start = time.perf_counter()
+                collection = deck.load_directory(directory, workers)
+                durations.append(time.perf_counter() - start)
+            report(f"compile with {workers or 'all'} processes", durations)
+        report("open compiled decks", measure(
+                lambda: deck.load_directory(directory)))
+        print(f"  {len(collection.groups())} groups, "
+                f"{len(collection.select(collection.groups()))} entries")
+
+
+def bench_import(n_rows: int=1_000_000, n_distinct: int=50_000):
+    """Measures the import of a large CSV file whose [n_rows] rows repeat
+    [n_distinct] distinct cards, reporting the throughput and the peak of
+    memory, which follows the distinct cards and not the size of the file.
+
+    Args:
+        n_rows (optional): number of rows of the file. Defaults to 1000000.
+        n_distinct (optional): number of distinct cards. Defaults to 50000.
+    """
+
+    print(f"import of a {n_rows} row csv file ({n_distinct} distinct cards)")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "cards.csv")
+        with open(source, 'w', encoding='utf8') as datafile:
+            for i in range(n_rows):
+                card = i % n_distinct
+                datafile.write(f'ord{card},"meaning {card}, and more",'
+                                f'Group {card % 40},extra column {i}\n')
+        target = os.path.join(directory, "cards.deck")
+
+        def run():
+            importer.import_entries(importer.read_csv(source, 0, 1, 2),
+                                    source, target)
+
+        duration = min(measure(run, repeat=1))
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = os.path.getsize(source)
+        print(f"  csv {size/1e6:.0f} MB in {duration:.1f} s "
+                f"({size/1e6/duration:.1f} MB/s), "
+                f"peak memory {peak/1e6:.1f} MB, "
+                f"deck {os.path.getsize(target)/1e6:.1f} MB")
+
+
+def bench_distractors(n_lines: int=20_000, questions: int=20_000):
+    """Compares the former rejection loop for the wrong options with the
+    sampler without replacement, on a deck where most entries share the same
+    translation.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 20000.
+        questions (optional): number of questions. Defaults to 20000.
+    """
+
+    print(f"wrong options of {questions} questions, 95% shared translation")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        with open(source, 'w', encoding='utf8') as datafile:
+            for i in range(n_lines):
+                meaning = f"meaning {i}" if i % 20 == 0 else "to be"
+                datafile.write(f"word{i}#{meaning}#Group {i % 10}\n")
+        store = deck.load_words(source)
+        pool = store.select(store.groups())
+        sampler = sampling.DistractorSampler(pool, store,
+                                                senses.SenseIndex(store, pool))
+
+        def rejection():
+            for _ in range(questions):
+                entry_id = random.choice(pool)
+                correct = store.entry(entry_id)[1]
+                wrong = []
+                while len(wrong) < 3:
+                    answer = store.entry(random.choice(pool))[1]
+                    if answer != correct:
+                        wrong.append(answer)
+
+        def without_replacement():
+            for _ in range(questions):
+                sampler.pick(random.choice(pool), 1)
+
+        report("rejection loop", measure(rejection, repeat=3))
+        report("sampling without replacement", measure(without_replacement,
+                                                        repeat=3))
+
+
+def bench_questions(n_lines: int=200_000, count: int=50,
+                    pause: float=0.02):
+    """Measures the time to obtain the next question when it is made on
+    demand and when it is taken from the look-ahead queue, with a [pause]
+    between questions that stands for the feedback delay of the app.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 200000.
+        count (optional): number of questions. Defaults to 50.
+        pause (optional): seconds between questions. Defaults to 0.02.
+    """
+
+    print(f"next question of a {n_lines} line deck, every group selected")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        store = deck.load_words(source)
+        pool = store.select(store.groups())
+        sampler = sampling.DistractorSampler(pool, store,
+                                                senses.SenseIndex(store, pool))
+
+        def make():
+            return questions.make_question(pool, store, sampler,
+                                            lambda word: None)
+
+        def next_questions(get: Callable) -> List[float]:
+            durations = []
+            for _ in range(count):
+                time.sleep(pause)
+                start = time.perf_counter()
+                get()
+                durations.append(time.perf_counter() - start)
+            return durations
+
+        make()
+        report("made on demand", next_questions(make))
+        ready = questions.QuestionQueue(make)
+        try:
+            report("taken from the queue", next_questions(ready.get))
+        finally:
+            ready.close()
+
+
+def bench_quiz(n_lines: int=20_000, n_answers: int=1_000_000):
+    """Measures how many simulated answers per minute the quiz engine takes,
+    with questions made in advance and with questions made on demand. The
+    simulated learner chooses a random option until it is the right one.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 20000.
+        n_answers (optional): number of answers. Defaults to 1000000.
+    """
+
+    print(f"{n_answers} simulated answers on a {n_lines} line deck")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        store = deck.load_words(source)
+        pool = store.select(store.groups())
+        sampler = sampling.DistractorSampler(pool, store,
+                                                senses.SenseIndex(store, pool))
+
+        def make():
+            return questions.make_question(pool, store, sampler)
+
+        def play(next_question: Callable, answers: int) -> float:
+            engine = quiz.QuizEngine(next_question)
+            choose = random.randrange
+            engine.next()
+            start = time.perf_counter()
+            for _ in range(answers):
+                if engine.answer(choose(len(engine.question.options))):
+                    engine.next()
+            return (time.perf_counter() - start) / answers
+
+        made = [make() for _ in range(1000)]
+        ready = iter(made * (n_answers // len(made) + 2)).__next__
+        for name, next_question, answers in (
+                ("questions made in advance", ready, n_answers),
+                ("questions made on demand", make, n_answers // 10)):
+            duration = play(next_question, answers)
+            print(f"  {name:<32} {60 / duration / 1e6:9.2f} million "
+                    f"answers per minute")
+
+
+def bench_batch(n_lines: int=200_000, size: int=100_000):
+    """Compares making [size] questions one at a time with making them in one
+    vectorized batch. Needs NumPy.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 200000.
+        size (optional): number of questions. Defaults to 100000.
+    """
+
+    import batch
+
+    print(f"{size} questions of a {n_lines} line deck, every group selected")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        store = deck.load_words(source)
+        pool = store.select(store.groups())
+        sampler = sampling.DistractorSampler(pool, store,
+                                                senses.SenseIndex(store, pool))
+        sampler.answer_ids(0), sampler.answer_ids(1)
+
+        def one_at_a_time():
+            rng = random.Random(0)
+            for _ in range(size):
+                entry_id = rng.choice(pool)
+                sampler.pick(entry_id, rng.choice((0, 1)), rng=rng)
+
+        arrays = batch.deck_arrays(pool, store)
+        report("one at a time", measure(one_at_a_time, repeat=3))
+        report("deck to arrays (once per game)", measure(
+                lambda: batch.deck_arrays(pool, store), repeat=3))
+        report("vectorized batch", measure(
+                lambda: batch.batch_questions(arrays, size, seed=0)))
+
+
+def bench_scheduler(pool_sizes: tuple=(10_000, 1_000_000),
+                    reviews: int=200_000):
+    """Measures the cost of choosing an entry and reviewing it in the spaced
+    repetition mode, with a simulated clock that advances 10 seconds per
+    review and a learner that answers right 80% of the time.
+
+    Args:
+        pool_sizes (optional): sizes of the pools. Defaults to (10000,
+            1000000).
+        reviews (optional): number of reviews. Defaults to 200000.
+    """
+
+    print(f"{reviews} spaced repetition reviews")
+    for size in pool_sizes:
+        now = [0.0]
+        rng = random.Random(0)
+
+        def review():
+            chooser = scheduler.Scheduler(range(size), clock=lambda: now[0],
+                                            rng=rng)
+            for _ in range(reviews):
+                chooser.review(chooser.next(), 4 if rng.random() < 0.8 else 1)
+                now[0] += 10
+
+        durations = measure(review, repeat=3)
+        report(f"pool of {size} entries", durations)
+        print(f"  {'':<32} {min(durations) / reviews * 1e6:9.2f} us per "
+                f"review")
+
+
+def bench_reviews(n_answers: int=20_000, n_entries: int=200_000):
+    """Compares recording answers in the binary review log with writing a
+    JSON file per answer, and measures reading the history at startup with a
+    snapshot of [n_entries] entries and a full log.
+
+    Args:
+        n_answers (optional): number of answers. Defaults to 20000.
+        n_entries (optional): number of entries of the snapshot. Defaults to
+            200000.
+    """
+
+    print(f"{n_answers} answers recorded")
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "reviews.log")
+        answers = [(f"ord{i % n_entries}", "word", 1e9 + i, i % 2,
+                    i % 3 != 0, 1.5) for i in range(n_answers)]
+
+        def json_per_answer():
+            for number, answer in enumerate(answers[:n_answers // 10]):
+                with open(os.path.join(directory, f"{number}.json"),
+                            'w') as datafile:
+                    json.dump(answer, datafile)
+                    datafile.flush()
+                    os.fsync(datafile.fileno())
+
+        def binary_log():
+            log = reviewlog.ReviewLog(filename)
+            for answer in answers:
+                log.record(*answer)
+            log.flush()
+            return log
+
+        durations = measure(json_per_answer, repeat=1)
+        per_answer = min(durations) / (n_answers // 10)
+        print(f"  {'json file per answer':<32} "
+                f"{per_answer * 1e6:9.2f} us per answer")
+        start = time.perf_counter()
+        log = binary_log()
+        duration = time.perf_counter() - start
+        print(f"  {'binary log, UI thread':<32} "
+                f"{duration / n_answers * 1e6:9.2f} us per answer")
+        log.close()
+
+        summaries = {entry_id: reviewlog.Summary(3, 2, 1e9, 4.5)
+                        for entry_id in range(n_entries)}
+        reviewlog.write_atomically(log.snapshot, reviewlog.snapshot_content(
+                                                    summaries, log.generation))
+        report(f"startup, {log.records} records to replay", measure(
+                lambda: reviewlog.ReviewLog(filename).close()))
+
+
+def bench_weighted(pool_sizes: tuple=(10_000, 100_000), draws: int=2_000):
+    """Compares choosing entries weighted by their wrong answers with a
+    Fenwick tree and with random.choices over the weights, which scans them
+    again after each answer changes a weight.
+
+    Args:
+        pool_sizes (optional): sizes of the pools. Defaults to (10000,
+            100000).
+        draws (optional): number of choices, each followed by a wrong answer.
+            Defaults to 2000.
+    """
+
+    print(f"{draws} weighted choices, each followed by a wrong answer")
+    for size in pool_sizes:
+        pool = range(size)
+
+        def linear():
+            weights = [1] * size
+            for _ in range(draws):
+                entry_id = random.choices(pool, weights)[0]
+                weights[entry_id] += 1
+
+        def fenwick():
+            sampler = sampling.WeightedSampler(pool)
+            for _ in range(draws):
+                sampler.add(sampler.choice())
+
+        report(f"random.choices, {size} entries", measure(linear, repeat=1))
+        report(f"fenwick tree, {size} entries", measure(fenwick, repeat=3))
+
+
+def bench_replay(n_lines: int=20_000, n_questions: int=50_000):
+    """Records a simulated session of [n_questions] questions in every mode
+    and measures its replay at full speed, which plays the same questions
+    and answers every time.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 20000.
+        n_questions (optional): number of questions of the session. Defaults
+            to 50000.
+    """
+
+    print(f"replay of {n_questions} questions on a {n_lines} line deck")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        store = deck.load_words(source)
+        groups = store.groups()[:10]
+
+        for mode in ("random", "weighted", "spaced"):
+            now = [0.0]
+            game = session.Game(store, groups, mode, seed=1,
+                                clock=lambda: now[0])
+            recorder = session.SessionRecorder(game)
+            engine = quiz.QuizEngine(game.next_question)
+            learner = random.Random(2)
+            for _ in range(n_questions):
+                question = engine.next()
+                recorder.question(question, now[0])
+                correct = False
+                while not correct:
+                    now[0] += learner.choice((5, 30, 90))
+                    option = learner.randrange(len(question.options))
+                    correct = engine.answer(option)
+                    game.answered(question.entry_id, correct, engine.tries)
+                    recorder.answer(option, now[0])
+
+            durations = measure(lambda: session.replay(recorder.recording,
+                                                        store), repeat=3)
+            report(f"{mode}, {engine.answers} answers", durations)
+
+
+def bench_order(n_lines: int=2_000, n_questions: int=2_000, recent: int=5):
+    """Compares how the entries of a game are asked in the random mode, with
+    and without the guard against the last [recent] entries, and in the
+    epoch mode: the questions that repeat one of the last [recent] entries,
+    the entries of the pool asked at least once and the cost of a question.
+
+    Args:
+        n_lines (optional): number of lines of the synthetic words file.
+            Defaults to 2000.
+        n_questions (optional): number of questions. Defaults to 2000.
+        recent (optional): size of the guard. Defaults to 5.
+    """
+
+    print(f"{n_questions} questions of a {n_lines} line deck, "
+            f"repeats within the last {recent}")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "words.txt")
+        synthetic_words(source, n_lines)
+        store = deck.load_words(source)
+
+        for name, mode, guard in (("random", "random", 0),
+                                    ("random with guard", "random", recent),
+                                    ("epoch", "epoch", 0)):
+            game = session.Game(store, store.groups(), mode, seed=1,
+                                recent=guard)
+            start = time.perf_counter()
+            asked = [game.next_question().entry_id
+                        for _ in range(n_questions)]
+            duration = time.perf_counter() - start
+            repeats = sum(entry_id in asked[max(0, number - recent):number]
+                            for number, entry_id in enumerate(asked))
+            print(f"  {name:<32} {repeats:6d} repeats   "
+                    f"{len(set(asked)) / len(game.pool):6.1%} of the pool   "
+                    f"{duration / n_questions * 1e6:7.1f} us per question")
+
+
+def bench_widgets(n_questions: int=2_000):
+    """Compares showing a question by clearing the quiz screen and creating
+    a label and four buttons, each bound to a new functools.partial, with
+    updating a label and buttons created once. Reports the time per
+    question and the peak memory allocated while the questions are shown.
+    Needs Kivy and a display.
+
+    Args:
+        n_questions (optional): number of questions. Defaults to 2000.
+    """
+
+    import functools
+    from kivy.uix.button import Button
+    from kivy.uix.gridlayout import GridLayout
+    from kivy.uix.label import Label
+
+    print(f"{n_questions} questions shown on the quiz screen")
+    texts = [(f"question {number}", [f"option {number}.{slot}"
+                                        for slot in range(4)])
+                for number in range(n_questions)]
+    layout = GridLayout(cols=1)
+
+    def callback(option, instance):
+        pass
+
+    def rebuild():
+        for question, options in texts:
+            layout.clear_widgets()
+            layout.add_widget(Label(text=question, size_hint_y=None))
+            for option, text in enumerate(options):
+                button = Button(text=text, size_hint_y=None)
+                button.bind(on_press=functools.partial(callback, option))
+                layout.add_widget(button)
+
+    label = Label(size_hint_y=None)
+    buttons = [Button(size_hint_y=None) for _ in range(4)]
+    def pooled():
+        if label.parent is not layout:
+            layout.clear_widgets()
+            layout.add_widget(label)
+            for button in buttons:
+                button.bind(on_press=callback)
+                layout.add_widget(button)
+        for question, options in texts:
+            label.text = question
+            for button, text in zip(buttons, options):
+                button.text = text
+                button.background_normal = button.property(
+                                            "background_normal").defaultvalue
+
+    for name, show in (("clear and rebuild", rebuild),
+                        ("pooled widgets", pooled)):
+        show()
+        duration = min(measure(show, repeat=3))
+        tracemalloc.start()
+        show()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:<32} {duration / n_questions * 1e6:9.1f} us per "
+                f"question   peak {peak / 1024:9.1f} KiB allocated")
+
+
+def bench_picker(n_groups: int=500):
+    """Compares opening the vocabulary set picker with one button per set,
+    as a grid grown to hold them all, with a RecycleView that only creates
+    the rows that are visible. Reports the time to open the picker and the
+    number of rows created. Needs Kivy and a display.
+
+    Args:
+        n_groups (optional): number of vocabulary sets. Defaults to 500.
+    """
+
+    from kivy.core.window import Window
+    from kivy.uix.button import Button
+    from kivy.uix.gridlayout import GridLayout
+    from kivy.uix.recycleboxlayout import RecycleBoxLayout
+    from kivy.uix.recycleview import RecycleView
+
+    print(f"picker of {n_groups} vocabulary sets")
+    groups = [f"set {number}" for number in range(n_groups)]
+    height = .2*Window.height
+
+    layout = GridLayout(cols=1, size_hint_y=None)
+    def buttons():
+        layout.clear_widgets()
+        layout.height = height * len(groups)
+        for group in groups:
+            layout.add_widget(Button(text=group, size_hint_y=None,
+                                        height=height))
+        layout.do_layout()
+        return len(layout.children)
+
+    picker = RecycleView(viewclass=Button, size=(Window.width, 2*height))
+    rows = RecycleBoxLayout(orientation="vertical", size_hint_y=None,
+                            default_size=(None, height),
+                            default_size_hint=(1, None))
+    rows.bind(minimum_height=rows.setter("height"))
+    picker.add_widget(rows)
+    data = [{"text": group} for group in groups]
+    def recycled():
+        picker.data = data
+        # lays the rows out now instead of at the next frame
+        picker.refresh_views()
+        return len(rows.children)
+
+    for name, show in (("one button per set", buttons),
+                        ("recycle view", recycled)):
+        created = show()
+        duration = min(measure(show, repeat=3))
+        print(f"  {name:<32} {duration*1000:9.2f} ms to open   "
+                f"{created:5d} rows created")
+
+
+BENCHMARKS = {
+    'startup': bench_startup,
+    'storage': bench_storage,
+    'menu': bench_menu,
+    'memory': bench_memory,
+    'union': bench_union,
+    'reload': bench_reload,
+    'directory': bench_directory,
+    'import': bench_import,
+    'distractors': bench_distractors,
+    'questions': bench_questions,
+    'quiz': bench_quiz,
+    'batch': bench_batch,
+    'scheduler': bench_scheduler,
+    'reviews': bench_reviews,
+    'weighted': bench_weighted,
+    'replay': bench_replay,
+    'order': bench_order,
+    'widgets': bench_widgets,
+    'picker': bench_picker,
+}
+
+
+###############################################################################
+
+if __name__ == '__main__':
+    # the widgets and picker benchmarks need a display, so they only run when
+    # asked for
+    for name in sys.argv[1:] or [name for name in BENCHMARKS
+                                    if name not in ('widgets', 'picker')]:
+        BENCHMARKS[name]()
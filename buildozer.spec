@@ -13,7 +13,7 @@ package.domain = org.danishlearn
 source.dir = .
 
 # (list) Source files to include (let empty to include all the files)
-source.include_exts = py,png,jpg,kv,atlas,mp3,txt
+source.include_exts = py,png,jpg,kv,atlas,mp3,txt,deck
 
 # (list) List of inclusions using pattern matching
 #source.include_patterns = assets/*,images/*.png,mp3_files/*
@@ -25,7 +25,7 @@ source.include_exts = py,png,jpg,kv,atlas,mp3,txt
 #source.exclude_dirs = tests, bin
 
 # (list) List of exclusions using pattern matching
-#source.exclude_patterns = license,images/*/*.jpg
+source.exclude_patterns = benchmark.py,importer.py,batch.py,simulate.py
 
 # (str) Application versioning (method 1)
 version = 0.1
@@ -36,7 +36,7 @@ version = 0.1
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy==2.0.0,aiohttp,aiofiles
+requirements = python3,kivy==2.0.0,aiohttp,aiofiles,sqlite3
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
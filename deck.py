@@ -0,0 +1,1158 @@
+"""This script corresponds to the storage of the vocabulary. It reads the
+words file and keeps a compiled binary version of it (the deck), so that the
+text only has to be parsed when the words file changes.
+"""
+
+import os
+import sys
+import mmap
+import bisect
+import struct
+import zlib
+import hashlib
+import operator
+import functools
+import itertools
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import (Callable, Dict, Set, List, Sequence, Iterable, Iterator,
+                    Optional)
+
+from vocabulary import Entry, read_entries
+
+
+###############################################################################
+# parsing of the words file
+
+def find_words(filename: str) -> Dict[str, Set[tuple]]:
+    """Opens the file that has the words and respective translations and stores
+    the values in a dictionary that maps each vocabulary group to the set of
+    its words and respective translations.
+
+    Args:
+        filename: name of the file that has the words and their respective
+            translations
+
+    Returns:
+        dictionary of the vocabulary groups and their words and translations
+
+    Requires:
+        filename must correspond to a valid file
+        different words in file [filename] must be in separate lines
+        words must be separated from their meaning by a # character
+    """
+
+    vocab_groups = {}
+    for word, translation, group in read_entries(filename):
+        if group in vocab_groups:
+            vocab_groups[group].add((word, translation))
+        else:
+            vocab_groups[group] = {(word, translation)}
+
+    return vocab_groups
+
+
+###############################################################################
+# compiled deck
+#
+# Layout of a deck file (little endian):
+#   header: magic, version, size and mtime of the words file, sha256 of the
+#       words file, number of groups, entries and strings, and the offsets of
+#       the entries, string offsets, strings, string table and entry table
+#       sections
+#   index: for each group, length of the name, name, number of entries and
+#       offset of the array with the ids of its entries
+#   entries: for each entry, the ids of its word and of its translation
+#   string offsets: start of each string in the strings section, followed by
+#       the end of the last one
+#   members: for each group, the sorted ids of its entries
+#   string table: hash table of the strings, whose slots hold the id of a
+#       string plus one (0 for an empty slot), at the crc32 of the string
+#   entry table: hash table of the entries, in the same way, at the hash of
+#       the ids of their word and translation (see pair_hash)
+#   strings: every distinct word and translation, encoded in utf8
+# Every number after the index is a 32 bit unsigned integer, so the deck is
+# read through mmap and used in place: an entry is an id, a group is an array
+# of ids and a string is only decoded when it is shown. The hash tables have
+# a power of two size of at least twice their number of items and are probed
+# linearly, so a string or an entry is found without decoding the deck.
+
+MAGIC = b"DLDK"
+VERSION = 4
+HEADER = struct.Struct("<4sHQq32sIIIQQQQQ")
+# mtime of the words file and its offset in the header
+MTIME = struct.Struct("<q")
+MTIME_AT = struct.calcsize("<4sHQ")
+GROUP_NAME = struct.Struct("<H")
+GROUP_INDEX = struct.Struct("<IQ")
+# positions of the bits set in each possible byte
+BIT_POSITIONS = [tuple(bit for bit in range(8) if byte >> bit & 1)
+                    for byte in range(256)]
+
+
+def deck_path(filename: str) -> str:
+    """Obtains the name of the compiled deck of the words file [filename].
+
+    Args:
+        filename: name of the words file
+
+    Returns:
+        name of the compiled deck file
+    """
+
+    return os.path.splitext(filename)[0] + ".deck"
+
+
+def file_digest(filename: str) -> bytes:
+    """Computes the sha256 hash of the content of the file [filename].
+
+    Args:
+        filename: name of the file
+
+    Returns:
+        digest of the content of the file
+    """
+
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as datafile:
+        for chunk in iter(lambda: datafile.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def little_endian(values: array) -> bytes:
+    """Obtains the little endian representation of an array of integers.
+
+    Args:
+        values: array of integers
+
+    Returns:
+        bytes of the array in little endian order
+    """
+
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def uint32_view(data: memoryview, start: int, count: int) -> Sequence[int]:
+    """Obtains the [count] 32 bit unsigned integers stored from the byte
+    [start] of [data], without copying them on little endian machines.
+
+    Args:
+        data: content of the deck
+        start: offset of the first integer
+        count: number of integers
+
+    Returns:
+        sequence of the integers
+    """
+
+    view = data[start:start + 4*count]
+    if sys.byteorder == 'little':
+        return view.cast('I')
+    values = array('I', view.tobytes())
+    values.byteswap()
+    return values
+
+
+def table_size(count: int) -> int:
+    """Obtains the number of slots of a hash table of [count] items.
+
+    Args:
+        count: number of items
+
+    Returns:
+        smallest power of two that is at least twice the number of items
+    """
+
+    return 1 << max(1, (2*count - 1).bit_length())
+
+
+def pair_hash(word_id: int, translation_id: int, size: int) -> int:
+    """Obtains the slot of the entry ([word_id], [translation_id]) in the
+    entry table, by multiplicative hashing of the two ids.
+
+    Args:
+        word_id: id of the word
+        translation_id: id of the translation
+        size: number of slots of the table
+
+    Returns:
+        slot where the search of the entry starts
+    """
+
+    key = (word_id << 32 | translation_id) * 0x9E3779B97F4A7C15
+    return (key & 0xFFFFFFFFFFFFFFFF) >> (64 - size.bit_length() + 1)
+
+
+def bitset(ids: Iterable[int], size: int) -> int:
+    """Builds the bitset of the entry ids [ids], in which bit i is set if the
+    entry i belongs to the set.
+
+    Args:
+        ids: entry ids
+        size: number of entries of the deck
+
+    Returns:
+        bitset of the ids
+    """
+
+    bits = bytearray((size + 7) // 8)
+    for entry_id in ids:
+        bits[entry_id >> 3] |= 1 << (entry_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def bitset_ids(bits: int) -> array:
+    """Obtains the entry ids whose bits are set in the bitset [bits].
+
+    Args:
+        bits: bitset of entry ids
+
+    Returns:
+        sorted entry ids
+    """
+
+    ids = array('I')
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    for index, byte in enumerate(data):
+        if byte:
+            base = 8*index
+            ids.extend(base + bit for bit in BIT_POSITIONS[byte])
+    return ids
+
+
+class DeckBuilder:
+    """Builds the content of a deck from entries added one at a time, so that
+    a vocabulary can be compiled while it is read. Every distinct string is
+    stored once and every distinct (word, translation) pair gets a single
+    entry id, even if it belongs to several groups.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.entries = {}
+        self.pairs = array('I')
+        self.members = {}
+
+
+    def add(self, word: str, translation: str, group: str):
+        """Adds the entry ([word], [translation]) to the vocabulary group
+        [group].
+
+        Args:
+            word: danish word
+            translation: translation of the word
+            group: name of the vocabulary group
+        """
+
+        strings = self.strings
+        pair = (strings.setdefault(word, len(strings)),
+                strings.setdefault(translation, len(strings)))
+        entry_id = self.entries.setdefault(pair, len(self.entries))
+        if 2*entry_id == len(self.pairs):
+            self.pairs.extend(pair)
+        if group not in self.members:
+            self.members[group] = array('I')
+        self.members[group].append(entry_id)
+
+
+    def chunks(self, source: str) -> Iterator[bytes]:
+        """Generates the content of the deck, signed with the size, mtime and
+        hash of the file [source] the vocabulary was read from.
+
+        Args:
+            source: name of the file the vocabulary was read from
+
+        Yields:
+            consecutive parts of the content of the deck
+        """
+
+        members = [array('I', sorted(set(ids)))
+                    for ids in self.members.values()]
+        encoded = [string.encode('utf8') for string in self.strings]
+        offsets = array('I', [0])
+        offsets.extend(itertools.accumulate(map(len, encoded)))
+
+        # the tables are filled as lists, which are faster to probe
+        size = table_size(len(encoded))
+        string_table = [0] * size
+        mask = size - 1
+        for string_id, slot in enumerate(map(zlib.crc32, encoded), 1):
+            slot &= mask
+            while string_table[slot]:
+                slot = (slot + 1) & mask
+            string_table[slot] = string_id
+
+        size = table_size(len(self.entries))
+        entry_table = [0] * size
+        mask = size - 1
+        shift = 65 - size.bit_length()
+        for entry_id, (word_id, translation_id) in enumerate(self.entries, 1):
+            # pair_hash, inlined
+            slot = ((word_id << 32 | translation_id) * 0x9E3779B97F4A7C15 &
+                    0xFFFFFFFFFFFFFFFF) >> shift
+            while entry_table[slot]:
+                slot = (slot + 1) & mask
+            entry_table[slot] = entry_id
+        string_table = array('I', string_table)
+        entry_table = array('I', entry_table)
+
+        names = [group.encode('utf8') for group in self.members]
+        index_size = sum(GROUP_NAME.size + len(name) + GROUP_INDEX.size
+                            for name in names)
+        padding = -(HEADER.size + index_size) % 4
+        entries_at = HEADER.size + index_size + padding
+        offsets_at = entries_at + 4*len(self.pairs)
+        members_at = offsets_at + 4*len(offsets)
+        string_table_at = members_at + 4*sum(len(ids) for ids in members)
+        entry_table_at = string_table_at + 4*len(string_table)
+        strings_at = entry_table_at + 4*len(entry_table)
+
+        stat = os.stat(source)
+        yield HEADER.pack(MAGIC, VERSION, stat.st_size, stat.st_mtime_ns,
+                            file_digest(source), len(names), len(self.entries),
+                            len(self.strings), entries_at, offsets_at,
+                            strings_at, string_table_at, entry_table_at)
+        for name, ids in zip(names, members):
+            yield GROUP_NAME.pack(len(name)) + name
+            yield GROUP_INDEX.pack(len(ids), members_at)
+            members_at += 4*len(ids)
+        yield bytes(padding)
+        yield little_endian(self.pairs)
+        yield little_endian(offsets)
+        for ids in members:
+            yield little_endian(ids)
+        yield little_endian(string_table)
+        yield little_endian(entry_table)
+        yield from encoded
+
+
+def compile_words(filename: str) -> bytes:
+    """Compiles the words file [filename] into the content of a deck, while
+    the file is read.
+
+    Args:
+        filename: name of the words file
+
+    Returns:
+        content of the deck
+    """
+
+    builder = DeckBuilder()
+    for entry in read_entries(filename):
+        builder.add(*entry)
+    return b"".join(builder.chunks(filename))
+
+
+def write_deck(chunks: Iterable[bytes], target: str):
+    """Writes the content of a deck into the compiled deck file [target]. The
+    file is written to a temporary file first, so a reader never sees half a
+    deck.
+
+    Args:
+        chunks: content of the deck, whole or in consecutive parts
+        target: name of the compiled deck file
+    """
+
+    temporary = target + ".tmp"
+    with open(temporary, 'wb') as deckfile:
+        deckfile.writelines(chunks)
+    os.replace(temporary, target)
+
+
+class Deck:
+    """Compiled deck used in place. Entries are integer ids into the arrays
+    of the deck, groups are arrays of entry ids and the words and
+    translations are only decoded when they are shown, so the vocabulary
+    does not become Python objects.
+        The changes of the words file applied by a reload are kept apart:
+    the entries that are not in the deck are appended after its entries, and
+    each changed group has the sets of ids added to and removed from it.
+    """
+
+    __slots__ = ("data", "index", "pairs", "offsets", "strings_at",
+                    "string_table", "entry_table", "bitsets", "unions",
+                    "added", "added_ids", "added_keys", "new_strings",
+                    "patched", "group_added", "group_removed")
+
+
+    def __init__(self, data):
+        """Reads the index of the deck whose content is [data].
+
+        Args:
+            data: content of the deck (bytes or a memory map of the file)
+
+        Raises:
+            ValueError: if the content is not a deck of this version
+        """
+
+        self.data = memoryview(data)
+        (magic, version, *_, n_groups, n_entries, n_strings, entries_at,
+            offsets_at, self.strings_at, string_table_at, entry_table_at
+            ) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} deck")
+
+        self.bitsets = {}
+        self.unions = {}
+        # entries added by reloads, and their ids by (word, translation)
+        self.added = []
+        self.added_ids = {}
+        # ids of the strings of the added entries, the strings that are not
+        # in the deck get new ids after those of the deck
+        self.added_keys = []
+        self.new_strings = {}
+        # groups changed by reloads and the ids added to and removed from them
+        self.patched = set()
+        self.group_added = {}
+        self.group_removed = {}
+        self.pairs = uint32_view(self.data, entries_at, 2*n_entries)
+        self.offsets = uint32_view(self.data, offsets_at, n_strings + 1)
+        self.string_table = uint32_view(self.data, string_table_at,
+                                        table_size(n_strings))
+        self.entry_table = uint32_view(self.data, entry_table_at,
+                                        table_size(n_entries))
+        self.index = {}
+        offset = HEADER.size
+        for _ in range(n_groups):
+            name_size, = GROUP_NAME.unpack_from(self.data, offset)
+            offset += GROUP_NAME.size
+            group = str(self.data[offset:offset + name_size], 'utf8')
+            offset += name_size
+            self.index[group] = GROUP_INDEX.unpack_from(self.data, offset)
+            offset += GROUP_INDEX.size
+
+
+    @classmethod
+    def open(cls, target: str) -> "Deck":
+        """Maps the compiled deck [target].
+
+        Args:
+            target: name of the compiled deck file
+
+        Returns:
+            deck of the file
+        """
+
+        with open(target, 'rb') as deckfile:
+            return cls(mmap.mmap(deckfile.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+    def __len__(self) -> int:
+        return len(self.pairs) // 2 + len(self.added)
+
+
+    def groups(self) -> List[str]:
+        """Obtains the names of the vocabulary groups.
+
+        Returns:
+            names of the vocabulary groups
+        """
+
+        return list(self.index)
+
+
+    def count(self, group: str) -> int:
+        """Obtains the number of entries of the vocabulary group [group].
+
+        Args:
+            group: name of the vocabulary group
+
+        Returns:
+            number of entries of the group
+        """
+
+        return self.index[group][0] + \
+                len(self.group_added.get(group, ())) - \
+                len(self.group_removed.get(group, ()))
+
+
+    def members(self, group: str) -> Sequence[int]:
+        """Obtains the ids of the entries of the vocabulary group [group].
+
+        Args:
+            group: name of the vocabulary group
+
+        Returns:
+            sorted ids of the entries of the group
+        """
+
+        count, start = self.index[group]
+        ids = uint32_view(self.data, start, count)
+        if group not in self.patched:
+            return ids
+        removed = self.group_removed.get(group, ())
+        return array('I', sorted([entry_id for entry_id in ids
+                                    if entry_id not in removed] +
+                                    list(self.group_added.get(group, ()))))
+
+
+    def has(self, group: str, entry_id: int) -> bool:
+        """Checks if the entry [entry_id] belongs to the vocabulary group
+        [group], with a binary search of the ids of the group in the deck.
+
+        Args:
+            group: name of the vocabulary group
+            entry_id: id of the entry
+
+        Returns:
+            True if the entry belongs to the group
+        """
+
+        if entry_id in self.group_added.get(group, ()):
+            return True
+        if entry_id in self.group_removed.get(group, ()):
+            return False
+        count, start = self.index.get(group, (0, 0))
+        ids = uint32_view(self.data, start, count)
+        position = bisect.bisect_left(ids, entry_id)
+        return position < count and ids[position] == entry_id
+
+
+    def bitset(self, group: str) -> int:
+        """Obtains the bitset of the entries of the vocabulary group [group].
+        It is built the first time the group is part of a union.
+
+        Args:
+            group: name of the vocabulary group
+
+        Returns:
+            bitset of the ids of the entries of the group
+        """
+
+        if group not in self.bitsets:
+            self.bitsets[group] = bitset(self.members(group), len(self))
+        return self.bitsets[group]
+
+
+    def select(self, groups: Iterable[str]) -> Sequence[int]:
+        """Obtains the ids of the entries of the vocabulary groups [groups],
+        without repetitions. The union of several groups is a single OR of
+        their bitsets and it is memoized by the set of groups, so starting
+        again with the same choice costs nothing.
+
+        Args:
+            groups: names of the vocabulary groups chosen
+
+        Returns:
+            sorted ids of the entries
+        """
+
+        groups = frozenset(groups)
+        if len(groups) == 1 and not groups & self.patched:
+            return self.members(next(iter(groups)))
+        if groups not in self.unions:
+            self.unions[groups] = bitset_ids(functools.reduce(
+                operator.or_, map(self.bitset, groups), 0))
+        return self.unions[groups]
+
+
+    def string(self, string_id: int) -> str:
+        """Decodes the string [string_id] of the deck.
+
+        Args:
+            string_id: id of the string
+
+        Returns:
+            word or translation
+        """
+
+        start = self.strings_at + self.offsets[string_id]
+        end = self.strings_at + self.offsets[string_id + 1]
+        return str(self.data[start:end], 'utf8')
+
+
+    def entry(self, entry_id: int) -> tuple:
+        """Obtains the word and translation of the entry [entry_id].
+
+        Args:
+            entry_id: id of the entry
+
+        Returns:
+            the word and its translation
+        """
+
+        base = len(self.pairs) // 2
+        if entry_id >= base:
+            return self.added[entry_id - base]
+        return (self.string(self.pairs[2*entry_id]),
+                self.string(self.pairs[2*entry_id + 1]))
+
+
+    def answer_key(self, entry_id: int, side: int):
+        """Obtains a key of the word or of the translation of the entry
+        [entry_id] that is equal for equal strings, without decoding it.
+
+        Args:
+            entry_id: id of the entry
+            side: 0 for the word and 1 for the translation
+
+        Returns:
+            id of the string
+        """
+
+        base = len(self.pairs) // 2
+        if entry_id >= base:
+            return self.added_keys[entry_id - base][side]
+        return self.pairs[2*entry_id + side]
+
+
+    def distinct_answers(self, pool: Sequence[int], side: int) -> array:
+        """Obtains one entry of the pool [pool] for each of its distinct words
+        or translations, the first one that has it. Only the ids of the
+        strings are compared, so nothing is decoded.
+
+        Args:
+            pool: ids of the entries
+            side: 0 for the words and 1 for the translations
+
+        Returns:
+            ids of the entries
+        """
+
+        keys = {}
+        for entry_id in pool:
+            keys.setdefault(self.answer_key(entry_id, side), entry_id)
+        return array('Q', keys.values())
+
+
+    def string_id(self, string: str) -> Optional[int]:
+        """Finds the id of the string [string] in the string table of the
+        deck.
+
+        Args:
+            string: word or translation
+
+        Returns:
+            id of the string or None if the deck does not have it
+        """
+
+        encoded = string.encode('utf8')
+        mask = len(self.string_table) - 1
+        slot = zlib.crc32(encoded) & mask
+        while self.string_table[slot]:
+            string_id = self.string_table[slot] - 1
+            start = self.strings_at + self.offsets[string_id]
+            end = self.strings_at + self.offsets[string_id + 1]
+            if self.data[start:end] == encoded:
+                return string_id
+            slot = (slot + 1) & mask
+        return None
+
+
+    def string_key(self, string: str) -> int:
+        """Obtains the id of the string [string] in the deck or, if the deck
+        does not have it, a new id after those of the deck, the same one for
+        equal strings.
+
+        Args:
+            string: word or translation
+
+        Returns:
+            id of the string
+        """
+
+        string_id = self.string_id(string)
+        if string_id is None:
+            string_id = self.new_strings.setdefault(
+                string, len(self.offsets) - 1 + len(self.new_strings))
+        return string_id
+
+
+    def find(self, word: str, translation: str) -> Optional[int]:
+        """Finds the id of the entry ([word], [translation]), in whatever
+        group it is, with the hash tables of the deck or among the entries
+        added by reloads.
+
+        Args:
+            word: danish word
+            translation: translation of the word
+
+        Returns:
+            id of the entry or None if there is no such entry
+        """
+
+        entry_id = self.added_ids.get((word, translation))
+        if entry_id is not None:
+            return entry_id
+        word_id = self.string_id(word)
+        translation_id = self.string_id(translation)
+        if word_id is None or translation_id is None:
+            return None
+
+        mask = len(self.entry_table) - 1
+        slot = pair_hash(word_id, translation_id, len(self.entry_table))
+        while self.entry_table[slot]:
+            entry_id = self.entry_table[slot] - 1
+            if self.pairs[2*entry_id] == word_id and \
+                    self.pairs[2*entry_id + 1] == translation_id:
+                return entry_id
+            slot = (slot + 1) & mask
+        return None
+
+
+    def entry_ids(self, word: str, translation: str, groups: Iterable[str]
+                    ) -> List[int]:
+        """Finds the entry ([word], [translation]) among the entries of the
+        vocabulary groups [groups].
+
+        Args:
+            word: danish word
+            translation: translation of the word
+            groups: names of the vocabulary groups
+
+        Returns:
+            id of the entry, if one of the groups has it
+        """
+
+        entry_id = self.find(word, translation)
+        if entry_id is None or not any(self.has(group, entry_id)
+                                        for group in groups):
+            return []
+        return [entry_id]
+
+
+    def apply(self, removed: Iterable[Entry], added: Iterable[Entry]):
+        """Applies a change of the words file to the deck without recompiling
+        it. Each changed line costs a lookup in the hash tables of the deck,
+        an update of the sets of its group and, for each memoized union that
+        contains the group, a binary search and an insertion or deletion in
+        the ids of the union, so the cost depends on the size of the change
+        and not on the size of the deck.
+            The deck file itself is left as is, it is recompiled on the next
+        start because it no longer matches the words file.
+
+        Args:
+            removed: entries that were removed from the words file
+            added: entries that were added to the words file
+        """
+
+        changed = {}
+        for word, translation, group in removed:
+            entry_id = self.find(word, translation)
+            if entry_id is None or not self.has(group, entry_id):
+                continue
+            if entry_id in self.group_added.get(group, ()):
+                self.group_added[group].discard(entry_id)
+            else:
+                self.group_removed.setdefault(group, set()).add(entry_id)
+            changed.setdefault(group, set()).add(entry_id)
+
+        for word, translation, group in added:
+            entry_id = self.find(word, translation)
+            if entry_id is None:
+                entry_id = len(self)
+                self.added.append((word, translation))
+                self.added_ids[(word, translation)] = entry_id
+                self.added_keys.append((self.string_key(word),
+                                        self.string_key(translation)))
+            if group not in self.index:
+                self.index[group] = (0, 0)
+            if self.has(group, entry_id):
+                continue
+            if entry_id in self.group_removed.get(group, ()):
+                self.group_removed[group].discard(entry_id)
+            else:
+                self.group_added.setdefault(group, set()).add(entry_id)
+            changed.setdefault(group, set()).add(entry_id)
+
+        for group in changed:
+            self.patched.add(group)
+            # rebuilt from the members if the group is part of a new union
+            self.bitsets.pop(group, None)
+
+        for groups, ids in self.unions.items():
+            for group in groups & changed.keys():
+                for entry_id in changed[group]:
+                    position = bisect.bisect_left(ids, entry_id)
+                    present = position < len(ids) and ids[position] == entry_id
+                    wanted = any(self.has(other, entry_id) for other in groups)
+                    if wanted and not present:
+                        ids.insert(position, entry_id)
+                    elif present and not wanted:
+                        del ids[position]
+
+
+def is_fresh(target: str, source: str) -> bool:
+    """Checks if the compiled deck [target] corresponds to the current content
+    of the words file [source]. The size and mtime of the words file are
+    checked first and the content hash is only computed when they differ (for
+    instance, after the files are unpacked from the APK), in which case the
+    mtime recorded in the deck is updated so the next check is quick again.
+
+    Args:
+        target: name of the compiled deck file
+        source: name of the words file
+
+    Returns:
+        True if the deck can be used instead of parsing the words file.
+    """
+
+    try:
+        with open(target, 'rb') as deckfile:
+            header = deckfile.read(HEADER.size)
+        magic, version, size, mtime, digest, *_ = HEADER.unpack(header)
+    except (OSError, struct.error):
+        return False
+
+    if magic != MAGIC or version != VERSION:
+        return False
+    return matches_source(source, size, mtime, digest,
+                            functools.partial(refresh_mtime, target))
+
+
+def refresh_mtime(target: str, mtime: int):
+    """Records the mtime [mtime] of the words file in the header of the
+    compiled deck [target]. A deck that cannot be written is left as is.
+
+    Args:
+        target: name of the compiled deck file
+        mtime: modification time of the words file in nanoseconds
+    """
+
+    try:
+        with open(target, 'r+b') as deckfile:
+            deckfile.seek(MTIME_AT)
+            deckfile.write(MTIME.pack(mtime))
+    except OSError:
+        pass
+
+
+def matches_source(source: str, size: int, mtime: int, digest: bytes,
+                    refresh: Optional[Callable[[int], None]]=None) -> bool:
+    """Checks if the words file [source] still has the content that was
+    recorded when a compiled version of it was produced.
+
+    Args:
+        source: name of the words file
+        size: size of the words file when it was compiled
+        mtime: modification time of the words file in nanoseconds when it
+            was compiled
+        digest: sha256 hash of the words file when it was compiled
+        refresh (optional): records the current mtime of the words file when
+            only its content hash matched. Defaults to None.
+
+    Returns:
+        True if the words file is missing (only the compiled version was
+            shipped) or has the same content.
+    """
+
+    if not os.path.exists(source):
+        return True
+
+    stat = os.stat(source)
+    if stat.st_size == size and stat.st_mtime_ns == mtime:
+        return True
+    if stat.st_size != size or file_digest(source) != digest:
+        return False
+    if refresh is not None:
+        refresh(stat.st_mtime_ns)
+    return True
+
+
+def load_words(filename: str, target: Optional[str]=None) -> Deck:
+    """Loads the vocabulary of the words file [filename]. It uses the
+    compiled deck if it is up to date and otherwise parses the words file and
+    (re)compiles the deck for the next start.
+
+    Args:
+        filename: name of the words file
+        target (optional): name of the compiled deck file. Defaults to None,
+            in which case the name of the words file with a .deck extension
+            is used.
+
+    Returns:
+        deck of the vocabulary
+    """
+
+    target = target or deck_path(filename)
+    if is_fresh(target, filename):
+        return Deck.open(target)
+
+    data = compile_words(filename)
+    try:
+        write_deck([data], target)
+    except OSError:
+        # a read-only location only costs the parse on the next start
+        pass
+    return Deck(data)
+
+
+###############################################################################
+# directory of decks
+
+def compile_file(filename: str):
+    """Makes sure the words file [filename] has an up to date compiled deck.
+    It runs in the worker processes of load_directory.
+
+    Args:
+        filename: name of the words file
+
+    Returns:
+        name of the compiled deck file or, if it could not be written, the
+            content of the deck
+    """
+
+    target = deck_path(filename)
+    if is_fresh(target, filename):
+        return target
+    data = compile_words(filename)
+    try:
+        write_deck([data], target)
+    except OSError:
+        return data
+    return target
+
+
+class DeckCollection:
+    """Decks of all the words files of a directory, seen as a single
+    vocabulary. Groups with the same name in different files are merged and
+    the entry id i of the deck k becomes the id i * (number of decks) + k.
+    """
+
+    def __init__(self, decks: List[Deck], errors: Dict[str, str]):
+        self.decks = decks
+        self.errors = errors
+        self.unions = {}
+
+
+    def groups(self) -> List[str]:
+        """Obtains the names of the vocabulary groups of every deck.
+
+        Returns:
+            names of the vocabulary groups
+        """
+
+        return list(dict.fromkeys(group for deck in self.decks
+                                    for group in deck.groups()))
+
+
+    def count(self, group: str) -> int:
+        """Obtains the number of entries of the vocabulary group [group] in
+        every deck.
+
+        Args:
+            group: name of the vocabulary group
+
+        Returns:
+            number of entries of the group
+        """
+
+        return sum(deck.count(group) for deck in self.decks
+                    if group in deck.index)
+
+
+    def select(self, groups: Iterable[str]) -> Sequence[int]:
+        """Obtains the ids of the entries of the vocabulary groups [groups]
+        of every deck. The result is memoized by the set of groups.
+
+        Args:
+            groups: names of the vocabulary groups chosen
+
+        Returns:
+            ids of the entries
+        """
+
+        groups = frozenset(groups)
+        if groups not in self.unions:
+            ids = array('Q')
+            n_decks = len(self.decks)
+            for number, deck in enumerate(self.decks):
+                chosen = groups & deck.index.keys()
+                if chosen:
+                    ids.extend(entry_id * n_decks + number
+                                for entry_id in deck.select(chosen))
+            self.unions[groups] = ids
+        return self.unions[groups]
+
+
+    def entry(self, entry_id: int) -> tuple:
+        """Obtains the word and translation of the entry [entry_id].
+
+        Args:
+            entry_id: id of the entry
+
+        Returns:
+            the word and its translation
+        """
+
+        entry_id, number = divmod(entry_id, len(self.decks))
+        return self.decks[number].entry(entry_id)
+
+
+    def answer_key(self, entry_id: int, side: int) -> str:
+        """Obtains a key of the word or of the translation of the entry
+        [entry_id] that is equal for equal strings.
+
+        Args:
+            entry_id: id of the entry
+            side: 0 for the word and 1 for the translation
+
+        Returns:
+            the word or the translation
+        """
+
+        return self.entry(entry_id)[side]
+
+
+    def entry_ids(self, word: str, translation: str, groups: Iterable[str]
+                    ) -> List[int]:
+        """Finds the entry ([word], [translation]) among the entries of the
+        vocabulary groups [groups] of every deck.
+
+        Args:
+            word: danish word
+            translation: translation of the word
+            groups: names of the vocabulary groups
+
+        Returns:
+            ids of the entry in the decks whose groups have it
+        """
+
+        n_decks = len(self.decks)
+        return [entry_id * n_decks + number
+                for number, deck in enumerate(self.decks)
+                for entry_id in deck.entry_ids(word, translation, groups)]
+
+
+    def distinct_answers(self, pool: Sequence[int], side: int) -> array:
+        """Obtains one entry of the pool [pool] for each of its distinct words
+        or translations. Each deck compares the ids of its strings, and only
+        the distinct answers of each deck are decoded to compare them across
+        decks.
+
+        Args:
+            pool: ids of the entries
+            side: 0 for the words and 1 for the translations
+
+        Returns:
+            ids of the entries
+        """
+
+        n_decks = len(self.decks)
+        members = [array('Q') for _ in self.decks]
+        for entry_id in pool:
+            entry_id, number = divmod(entry_id, n_decks)
+            members[number].append(entry_id)
+
+        keys = {}
+        for number, (deck, ids) in enumerate(zip(self.decks, members)):
+            for entry_id in deck.distinct_answers(ids, side):
+                keys.setdefault(deck.entry(entry_id)[side],
+                                entry_id * n_decks + number)
+        return array('Q', keys.values())
+
+
+def load_directory(directory: str, workers: Optional[int]=None
+                    ) -> DeckCollection:
+    """Loads every words file (.txt) of the directory [directory] and every
+    compiled deck (.deck) that has no words file. The files whose compiled
+    deck is missing or outdated are compiled in parallel by a
+    pool of processes, and a file that cannot be read is reported in the
+    errors of the collection instead of stopping the others.
+
+    Args:
+        directory: name of the directory of words files
+        workers (optional): number of processes. Defaults to None, in which
+            case the number of processors is used.
+
+    Returns:
+        collection of the decks of the directory
+    """
+
+    names = os.listdir(directory)
+    filenames = sorted(os.path.join(directory, name) for name in names
+                        if name.endswith(".txt"))
+    # decks without a words file, such as the ones written by the importer
+    standalone = sorted(os.path.join(directory, name) for name in names
+                        if name.endswith(".deck") and
+                        name[:-len(".deck")] + ".txt" not in names)
+    try:
+        executor = ProcessPoolExecutor(workers)
+    except (ImportError, NotImplementedError, OSError):
+        # Android has no working multiprocessing, the files are compiled
+        # one after the other
+        executor = None
+
+    results = {}
+    if executor is not None:
+        with executor:
+            futures = {filename: executor.submit(compile_file, filename)
+                        for filename in filenames}
+            for filename, future in futures.items():
+                try:
+                    results[filename] = future.result()
+                except Exception as error:
+                    results[filename] = error
+    else:
+        for filename in filenames:
+            try:
+                results[filename] = compile_file(filename)
+            except Exception as error:
+                results[filename] = error
+
+    decks, errors = [], {}
+    for filename, result in results.items():
+        if isinstance(result, Exception):
+            errors[filename] = f"{type(result).__name__}: {result}"
+        elif isinstance(result, bytes):
+            decks.append(Deck(result))
+        else:
+            decks.append(Deck.open(result))
+    for target in standalone:
+        try:
+            decks.append(Deck.open(target))
+        except (OSError, ValueError) as error:
+            errors[target] = f"{type(error).__name__}: {error}"
+    return DeckCollection(decks, errors)
+
+
+###############################################################################
+# storage engines
+#
+# The app only talks to the vocabulary through these methods, so that every
+# storage engine can be used by the menu and by the multiple choice game:
+#   groups() and count(group), for the menu;
+#   select(groups) and entry(entry_id), for the entries of a game;
+#   answer_key(entry_id, side) and distinct_answers(pool, side), for the wrong
+#       options of the questions;
+#   entry_ids(word, translation, groups), for the history of the entries;
+#   apply(removed, added), for the reloads of the words file (an engine
+#       opened from a directory, which is not watched, does not need it).
+
+def open_store(filename: str, engine: str="deck"):
+    """Opens the storage engine [engine] with the vocabulary of the words file
+    [filename].
+
+    Args:
+        filename: name of the words file or, for the "deck" engine, of a
+            directory of words files
+        engine (optional): "deck" to use the compiled deck or "sqlite" to use
+            an indexed SQLite database next to the words file. Defaults to
+            "deck".
+
+    Returns:
+        storage engine of the vocabulary
+
+    Raises:
+        ValueError: if the engine is unknown
+    """
+
+    if engine == "deck" and os.path.isdir(filename):
+        return load_directory(filename)
+    if engine == "deck":
+        return load_words(filename)
+    if engine == "sqlite":
+        from sqlite_store import SQLiteStore
+        return SQLiteStore.open(filename)
+    raise ValueError(f"unknown storage engine: {engine}")
+
+
+###############################################################################
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else 'words.txt'
+    write_deck([compile_words(source)], deck_path(source))
@@ -0,0 +1,259 @@
+"""This script imports vocabulary from CSV files and Anki text exports into a
+compiled deck, so that the cards do not have to be converted into the words
+file format by hand. The input is read one row at a time, so the memory used
+grows with the number of distinct words and not with the size of the file.
+
+Usage:
+    python importer.py cards.csv decks/cards.deck --word 0 --translation 1
+    python importer.py export.txt decks/anki.deck --format anki
+"""
+
+import re
+import csv
+import sys
+import html
+import argparse
+from typing import Iterator, Optional, Union
+
+from deck import DeckBuilder, write_deck
+from vocabulary import Entry
+
+
+###############################################################################
+# cleaning of the fields
+
+TAG = re.compile(r"<br\s*/?>|<[^>]*>", re.IGNORECASE)
+
+# Anki exports can have very long fields (html, embedded media names)
+csv.field_size_limit(2**31 - 1)
+
+
+def clean(field: str, is_html: bool=False) -> str:
+    """Cleans a field of the input, so that it can be shown by the app.
+
+    Args:
+        field: value of the field
+        is_html (optional): if the field is html, whose tags are removed and
+            entities decoded. Defaults to False.
+
+    Returns:
+        field in a single line, without leading or trailing whitespace
+    """
+
+    if is_html:
+        field = html.unescape(TAG.sub(" ", field))
+    return " ".join(field.split())
+
+
+def column_index(column: Union[int, str], header: Optional[list]) -> int:
+    """Obtains the index of a column given by its index or its name.
+
+    Args:
+        column: index (from 0) or name of the column
+        header: names of the columns, if the file has a header
+
+    Returns:
+        index of the column
+
+    Raises:
+        ValueError: if the column is a name and it is not in the header
+    """
+
+    if isinstance(column, int) or column.isdigit():
+        return int(column)
+    if header is None or column not in header:
+        raise ValueError(f"unknown column: {column}")
+    return header.index(column)
+
+
+###############################################################################
+# readers
+
+def read_csv(filename: str, word: Union[int, str]=0,
+                translation: Union[int, str]=1,
+                group: Union[int, str, None]=None, default_group: str="",
+                delimiter: str=",", header: bool=False) -> Iterator[Entry]:
+    """Reads the entries of a CSV file one row at a time.
+
+    Args:
+        filename: name of the CSV file
+        word (optional): column of the danish word. Defaults to 0.
+        translation (optional): column of the translation. Defaults to 1.
+        group (optional): column of the vocabulary group. Defaults to None,
+            in which case every entry belongs to [default_group].
+        default_group (optional): vocabulary group of the entries when there
+            is no group column. Defaults to "".
+        delimiter (optional): delimiter of the fields. Defaults to ",".
+        header (optional): if the first row has the names of the columns.
+            Defaults to False.
+
+    Yields:
+        entries of the file
+
+    Ensures:
+        rows without the word or the translation are skipped
+    """
+
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as datafile:
+        rows = csv.reader(datafile, delimiter=delimiter)
+        names = next(rows, None) if header else None
+        columns = [column_index(word, names), column_index(translation, names)]
+        if group is not None:
+            columns.append(column_index(group, names))
+
+        for row in rows:
+            if len(row) <= max(columns):
+                continue
+            fields = [clean(row[column]) for column in columns]
+            if fields[0] and fields[1]:
+                yield Entry(fields[0], fields[1],
+                            sys.intern(fields[2]) if group is not None
+                            else default_group)
+
+
+# separators of the "#separator:" header of Anki exports
+ANKI_SEPARATORS = {"tab": "\t", "comma": ",", "semicolon": ";", "space": " ",
+                    "pipe": "|", "colon": ":"}
+
+
+def read_anki(filename: str, word: Optional[int]=None,
+                translation: Optional[int]=None, default_group: str=""
+                ) -> Iterator[Entry]:
+    """Reads the entries of an Anki "Notes in Plain Text" export one note at
+    a time. The "#" header lines of the export give the separator, if the
+    fields are html and which columns have the deck, the tags, the note type
+    and the guid. By default the word and the translation are the first two
+    remaining columns and the vocabulary group is the deck.
+
+    Args:
+        filename: name of the export
+        word (optional): column of the danish word (from 0). Defaults to None.
+        translation (optional): column of the translation (from 0). Defaults
+            to None.
+        default_group (optional): vocabulary group of the entries when the
+            export has no deck column. Defaults to "".
+
+    Yields:
+        entries of the export
+
+    Raises:
+        ValueError: if a column header is not a number, or if the export does
+            not have two columns besides the deck, tags, note type and guid
+            columns and the columns of the word and the translation are not
+            given
+    """
+
+    settings = {"separator": "\t", "html": False}
+    special = {}
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as datafile:
+        line = datafile.readline()
+        while line.startswith("#"):
+            key, _, value = line[1:].strip().partition(":")
+            if key == "separator":
+                settings["separator"] = ANKI_SEPARATORS.get(value.lower(),
+                                                                value)
+            elif key == "html":
+                settings["html"] = value.lower() == "true"
+            elif key.endswith(" column"):
+                if not value.strip().isdigit():
+                    raise ValueError(f"invalid {key} header: {value}")
+                special[key[:-len(" column")]] = int(value) - 1
+            line = datafile.readline()
+
+        def lines():
+            yield line
+            yield from datafile
+
+        group = special.get("deck")
+        columns = None
+        for row in csv.reader(lines(), delimiter=settings["separator"]):
+            if columns is None:
+                fields = [column for column in range(len(row))
+                            if column not in special.values()]
+                if len(fields) < 2 and (word is None or translation is None):
+                    raise ValueError("the export does not have a word and a "
+                                        "translation column")
+                columns = [fields[0] if word is None else word,
+                            fields[1] if translation is None else translation]
+            if len(row) <= max(columns) or (group is not None and
+                                            len(row) <= group):
+                continue
+            values = [clean(row[column], settings["html"])
+                        for column in columns]
+            if values[0] and values[1]:
+                yield Entry(values[0], values[1],
+                            sys.intern(row[group]) if group is not None
+                            else default_group)
+
+
+###############################################################################
+# importing
+
+def import_entries(entries: Iterator[Entry], source: str, target: str) -> int:
+    """Compiles the entries into the deck [target] as they are read.
+
+    Args:
+        entries: entries to import
+        source: name of the file the entries are read from
+        target: name of the compiled deck file
+
+    Returns:
+        number of distinct entries of the deck
+    """
+
+    builder = DeckBuilder()
+    for entry in entries:
+        builder.add(*entry)
+    write_deck(builder.chunks(source), target)
+    return len(builder.entries)
+
+
+def main(arguments: Optional[list]=None):
+    """Imports a CSV file or an Anki export into a compiled deck, as given
+    by the command line [arguments].
+
+    Args:
+        arguments (optional): command line arguments. Defaults to None, in
+            which case sys.argv is used.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", help="CSV file or Anki text export")
+    parser.add_argument("target", help="compiled deck to write (.deck)")
+    parser.add_argument("--format", choices=("csv", "anki"), default="csv")
+    parser.add_argument("--word", help="column of the danish word")
+    parser.add_argument("--translation", help="column of the translation")
+    parser.add_argument("--group", help="column of the vocabulary group "
+                                        "(csv only)")
+    parser.add_argument("--group-name", default="Imported",
+                        help="vocabulary group when there is no group column")
+    parser.add_argument("--delimiter", default=",", help="csv delimiter")
+    parser.add_argument("--header", action="store_true",
+                        help="the csv file has a header row")
+    options = parser.parse_args(arguments)
+
+    if options.format == "anki":
+        for column in (options.word, options.translation):
+            if column is not None and not column.isdigit():
+                parser.error(f"anki columns are numbers, not {column}")
+        entries = read_anki(options.source,
+                            options.word and int(options.word),
+                            options.translation and int(options.translation),
+                            options.group_name)
+    else:
+        entries = read_csv(options.source, options.word or 0,
+                            options.translation or 1, options.group,
+                            options.group_name, options.delimiter,
+                            options.header)
+
+    try:
+        count = import_entries(entries, options.source, options.target)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    print(f"{count} entries written to {options.target}")
+
+
+###############################################################################
+
+if __name__ == '__main__':
+    main()
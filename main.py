@@ -1,12 +1,12 @@
 """This script correponds to the main application mechanisms.
 """
 
-import random
-import functools
-from collections import deque
 import os
 import re
-from typing import List, Callable
+import enum
+import time
+import functools
+from typing import Callable, Iterable, Optional
 
 from kivy.app import App
 from kivy.logger import Logger
@@ -14,12 +14,24 @@ from kivy.clock import Clock
 from kivy.utils import get_color_from_hex
 from kivy.resources import resource_add_path, resource_find
 from kivy.core.window import Window
+from kivy.properties import BooleanProperty, StringProperty
 
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.floatlayout import FloatLayout
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.screenmanager import NoTransition, Screen, ScreenManager
 from kivy.uix.button import Button
 from kivy.uix.label import Label
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+
+from deck import open_store
+from vocabulary import WordsWatcher
+from questions import Question, QuestionQueue
+from quiz import QuizEngine, State
+from reviewlog import ReviewLog, entry_key
+from scheduler import read_cards, write_cards
+from session import Game, SessionRecorder
 
 
 
@@ -48,35 +60,161 @@ def rename(word: str, reverse: bool=False) -> str:
         return re.sub("å", "8", new_word)
 
 
-def find_words(filename: str) -> List:
-    """Opens the file that has the words and respective translations and stores
-    the values in a list of tuples. THIS IS TEMPORARY.
+# option buttons of the quiz screen: the correct solution and 3 wrong ones
+OPTIONS = 4
+
+
+def find_audio(word: str) -> Optional[str]:
+    """Finds the audio file with the pronounciation of a danish word.
 
     Args:
-        filename: name of the file that has the words and their respective
-            translations
+        word: danish word
 
     Returns:
-        list of the words and their respective translations
-    
-    Requires:
-        filename must correspond to a valid file
-        different words in file [filename] must be in separate lines
-        words must be separated from their meaning by a # character
+        path of the audio file or None if there is none
     """
 
-    with open(filename, 'r', encoding='utf8') as datafile:
-        data = datafile.read()
-    
-    vocab_groups = {}
-    for line in data.splitlines():
-        *value, key = line.split("#")
-        if key in vocab_groups:
-            vocab_groups[key].add(tuple(value))
+    return resource_find(rename(f"{word}.mp3"))
+
+
+def on_audio_completion(player: "MusicPlayerAndroid",
+                        callback: Callable[[], None]):
+    """Calls [callback] in the main thread every time [player] finishes
+    playing.
+
+    Args:
+        player: audio player
+        callback: function without arguments
+
+    Returns:
+        listener of the player, which has to be kept while it is used
+    """
+
+    from jnius import PythonJavaClass, java_method
+
+    class CompletionListener(PythonJavaClass):
+        __javainterfaces__ = ['android/media/MediaPlayer$OnCompletionListener']
+        __javacontext__ = 'app'
+
+        @java_method('(Landroid/media/MediaPlayer;)V')
+        def onCompletion(self, mediaplayer):
+            # called in a thread of the player
+            Clock.schedule_once(lambda dt: callback())
+
+    listener = CompletionListener()
+    player.mplayer.setOnCompletionListener(listener)
+    return listener
+
+
+###############################################################################
+# vocabulary set picker
+
+class GroupRow(RecycleDataViewBehavior, Button):
+    """Row of the vocabulary set picker. Rows are only created for the sets
+    that are visible and are reused for other sets while scrolling, taking the
+    name, the number of words and the selection of a set from the data model
+    of the picker.
+    """
+
+    group = StringProperty("")
+    selected = BooleanProperty(False)
+
+
+    def refresh_view_attrs(self, view: RecycleView, index: int, data: dict):
+        """Shows the vocabulary set in position [index] of the data model.
+
+        Args:
+            view: picker the row belongs to
+            index: position of the set in the data model
+            data: row of the set in the data model
+        """
+
+        self.index = index
+        return super().refresh_view_attrs(view, index, data)
+
+
+    def on_selected(self, instance: Button, selected: bool):
+        """Highlights the row while its vocabulary set is chosen.
+
+        Args:
+            instance: this row
+            selected: if the set is chosen
+        """
+
+        if selected:
+            self.background_normal = ""
+            self.background_color = get_color_from_hex("#99ccff")
         else:
-            vocab_groups[key] = {tuple(value)}
+            self.background_normal = self.property(
+                                        "background_normal").defaultvalue
+            self.background_color = self.property(
+                                        "background_color").defaultvalue
+
 
-    return vocab_groups
+    def on_press(self):
+        App.get_running_app().vocab_choice(self)
+
+
+###############################################################################
+# quiz screen
+
+class Gate(enum.Enum):
+    """States of the input of the quiz screen."""
+    # the quiz screen is not shown, or its question is not shown yet
+    CLOSED = "closed"
+    # the option buttons answer the question shown
+    OPEN = "open"
+    # the right answer was accepted and is shown until the next question,
+    # and the option buttons are ignored
+    FEEDBACK = "feedback"
+
+
+class QuizPage(Screen):
+    """Screen of the multiple choice game, with the question and the option
+    buttons. The app has two of them: while the right answer is shown in one,
+    the next question is shown in the other, which is then switched to.
+    """
+
+    def __init__(self, answer: Callable[[Button], None], **kwargs):
+        """Creates the label and the option buttons of the screen.
+
+        Args:
+            answer: function called with the option button pressed
+        """
+
+        super().__init__(**kwargs)
+        layout = GridLayout(cols=1)
+        self.add_widget(layout)
+        self.label = Label(size_hint_y=None)
+        layout.add_widget(self.label)
+        self.buttons = [Button(size_hint_y=None) for _ in range(OPTIONS)]
+        for button in self.buttons:
+            button.bind(on_press=answer)
+            layout.add_widget(button)
+
+
+    def show(self, question: Question):
+        """Shows the question [question] in the screen, only updating its
+        widgets.
+
+        Args:
+            question: question to show
+        """
+
+        height = .2*Window.height
+        self.label.text = question.question
+        self.label.height = height
+        for slot, button in enumerate(self.buttons):
+            # pools with few different answers have fewer options
+            shown = slot < len(question.options)
+            button.text = question.options[slot][1] if shown else ""
+            button.disabled = not shown
+            button.opacity = 1 if shown else 0
+            button.height = height
+            button.background_normal = button.property(
+                                            "background_normal").defaultvalue
+            button.background_color = button.property(
+                                            "background_color").defaultvalue
 
 
 ###############################################################################
@@ -150,37 +288,261 @@ class MainApp(App):
     """Application class. Encopasses all the mechanisms related to the app.
     """
     resource_add_path(os.path.join(os.getcwd(), "mp3_files/"))
+    # storage engine of the vocabulary: "deck" or "sqlite" (large decks)
+    storage_engine = "deck"
+    # words file, or directory of words files that are loaded together
+    words_file = "words.txt"
+    # seconds between checks of the words file for changes
+    reload_interval = 2
+    # minimum seconds the correct answer is shown before the next question,
+    # which is also shown only once the word was pronounced
+    feedback_delay = 1
+    # number of questions made in advance
+    look_ahead = 3
+    # how the entries are asked: "random" (uniformly), "epoch" (each entry
+    # once per pass over the chosen sets), "weighted" (more often the more
+    # they were answered wrong) or "spaced" (spaced repetition, the entries
+    # due for review first)
+    study_mode = "random"
+    # number of last questions whose entries are not asked again, in the
+    # random and weighted modes
+    recent_guard = 5
+    # log of the answers given in the multiple choice game
+    reviews_file = "reviews.log"
+    # review states of the entries in the spaced repetition mode
+    cards_file = "reviews.cards"
+    # directory where the sessions are recorded, so that they can be replayed
+    # with session.replay, or None to not record them
+    sessions_dir = "sessions"
 
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.main_layout = GridLayout(cols=1, row_default_height=0.2, 
-                                        size_hint_y=None)
-        self.screen = ScrollView(size_hint=(1, None), effect_cls="ScrollEffect",
-                                    size=(Window.width, Window.height))
-        self.screen.add_widget(self.main_layout)
-        self.vocab_groups = find_words('words.txt')
+        # the home, picker and quiz screens are each built once and kept
+        self.manager = ScreenManager(transition=NoTransition())
+        self.resume_button = None
+        self.vocab_groups = open_store(self.words_file, self.storage_engine)
+        for filename, error in getattr(self.vocab_groups, "errors", {}).items():
+            Logger.warning(f'words: could not load {filename}: {error}')
+        self.selected_groups = set()
+        # data model of the vocabulary set picker, one row per set, and the
+        # positions of the rows chosen
+        self.group_rows = []
+        self.selected_rows = set()
+        self.picker = None
+        self.picker_label = None
         self.words_meannings = []
+        self.game = None
+        self.recorder = None
+        self.questions = None
+        self.quiz = None
+        self.next_question = None
+        self.tap_time = None
+        self.question_time = None
+        self.pronounciation = False
+        # the quiz screen shown and the one where the next question is
+        # prepared, and likewise for the audio players
+        self.pages = []
+        self.page = 0
+        self.prepared = None
+        self.prepared_time = None
+        self.review_log = ReviewLog(self.reviews_file)
+        # review states by key of the entries, shared with the scheduler of
+        # the game, which updates them
+        self.cards = read_cards(self.cards_file)
         self.mplayer = MusicPlayerAndroid()
+        self.spare_player = MusicPlayerAndroid()
+        self.spare_loaded = False
+        self.listeners = [on_audio_completion(player, functools.partial(
+                                                self.audio_finished, player))
+                            for player in (self.mplayer, self.spare_player)]
+        # taps on the option buttons are only answers while the gate is open
+        self.gate = Gate.CLOSED
+        # events scheduled by the quiz screen, by name, which are cancelled
+        # when it is left
+        self.events = {}
+        # the right answer is shown until both the feedback delay and its
+        # pronounciation are over
+        self.waiting_delay = False
+        self.waiting_audio = False
+        self.watcher = None
         Window.bind(on_keyboard=self.back_button)
 
 
-    def reset_layout(self):
-        """Resets self.main_layout to the settings, most layouts and screens
-        will require as a starting poit.
+    def on_start(self):
+        """Starts watching the words file for changes after the first frame,
+        so that reading it does not delay the start of the app.
+        """
+
+        Clock.schedule_once(self.start_watching, self.reload_interval)
+
+
+    def on_pause(self) -> bool:
+        """Writes the answers not written yet and the review states of the
+        entries, since a paused app can be closed by the system without being
+        stopped.
+
+        Returns:
+            True, so that the app is paused instead of stopped
         """
 
-        self.main_layout.clear_widgets()
-        self.main_layout.height = Window.height
-        self.main_layout.row_default_height=0.2
+        self.review_log.flush()
+        write_cards(self.cards_file, self.cards)
+        return True
+
 
+    def on_stop(self):
+        """Writes the answers not written yet, the review states of the
+        entries and the recording of the session.
+        """
+
+        self.save_session()
+        self.review_log.close()
+        write_cards(self.cards_file, self.cards)
+
+
+    def start_watching(self, dt: float):
+        """Reads the current content of the words file and checks it for
+        changes every self.reload_interval seconds. A directory of words files
+        is not watched.
+
+        Args:
+            dt: time elapsed since the callback was scheduled
+        """
+
+        if os.path.isfile(self.words_file):
+            self.watcher = WordsWatcher(self.words_file)
+            Clock.schedule_interval(self.reload_words, self.reload_interval)
+
+
+    def reload_words(self, dt: float):
+        """Applies the changes of the words file to the vocabulary and to the
+        vocabulary being used in the multiple choice game, without parsing the
+        whole file again.
+
+        Args:
+            dt: time elapsed since the last check
+        """
+
+        changes = self.watcher.poll()
+        if changes is None:
+            return
+
+        removed, added = changes
+        playing = self.quiz is not None
+        self.stop_questions()
+        self.save_session()
+        self.vocab_groups.apply(removed, added)
+        Logger.info(f'words: reloaded {len(removed)} removed and '
+                    f'{len(added)} added entries')
+        if playing:
+            # the game keeps its own sets, whatever is chosen in the picker
+            groups = set(self.vocab_groups.groups())
+            try:
+                self.prepare_questions([group for group in self.game.groups
+                                        if group in groups])
+            except ValueError as error:
+                Logger.warning(f'game: {error}, the game is ended')
+                self.quiz = None
+                if self.manager.current != "picker":
+                    self.show_home()
+            else:
+                self.quiz.next_question = self.next_question
+                # a question prepared during the feedback belongs to the old
+                # game
+                self.quiz.upcoming = None
+        if self.picker is not None:
+            self.update_picker()
+
+
+    def prepare_questions(self, groups: Iterable[str]):
+        """Starts a game over the entries of the vocabulary sets [groups] and
+        prepares how its questions are made: in advance, when the entries are
+        chosen uniformly, in passes or weighted by their wrong answers, or
+        when they are asked, in the spaced repetition mode, where the entry
+        to ask depends on the previous answers. The game being played, if
+        any, is only stopped and its recording written once the new one has
+        started.
+
+        Args:
+            groups: names of the vocabulary sets of the game
+
+        Raises:
+            ValueError: if the vocabulary sets have no words
+        """
 
-    def create_widget(self, label: bool, text: str, function: Callable=None, 
-                        color: str=None):
+        errors, cards = None, None
+        if self.study_mode == "weighted":
+            errors = self.review_log.errors(self.vocab_groups, groups)
+        elif self.study_mode == "spaced":
+            cards = self.review_log.entry_values(self.vocab_groups, groups,
+                                                    self.cards)
+        game = Game(self.vocab_groups, groups, self.study_mode,
+                    recent=self.recent_guard, errors=errors, cards=cards,
+                    find_audio=find_audio)
+        self.stop_questions()
+        self.save_session()
+        self.game = game
+        self.words_meannings = self.game.pool
+        Logger.info(f'game: seed {self.game.seed}')
+
+        look_ahead = 0 if self.study_mode == "spaced" else self.look_ahead
+        if self.sessions_dir is not None:
+            self.recorder = SessionRecorder(self.game, look_ahead)
+        if look_ahead == 0:
+            self.next_question = self.game.next_question
+        else:
+            self.questions = QuestionQueue(self.game.next_question, look_ahead)
+            self.next_question = self.questions.get
+
+
+    def save_session(self):
+        """Writes the recording of the session, if it has answers."""
+
+        if self.recorder is None or not any(
+                answers for *_, answers in
+                self.recorder.recording["questions"]):
+            return
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        filename = os.path.join(self.sessions_dir,
+                                f'{int(time.time())}-{self.game.seed}.json')
+        self.recorder.save(filename)
+        self.recorder = None
+        Logger.info(f'game: session recorded in {filename}')
+
+
+    def stop_questions(self):
+        """Stops making questions in advance, if a game is being played."""
+
+        if self.questions is not None:
+            self.questions.close()
+            self.questions = None
+
+
+    def add_screen(self, name: str) -> GridLayout:
+        """Creates the screen [name] of the app, with a layout of one column.
+
+        Args:
+            name: name of the screen
+
+        Returns:
+            layout of the screen, to which its widgets are added
+        """
+
+        layout = GridLayout(cols=1)
+        screen = Screen(name=name)
+        screen.add_widget(layout)
+        self.manager.add_widget(screen)
+        return layout
+
+
+    def create_widget(self, layout: GridLayout, label: bool, text: str,
+                        function: Callable=None, color: str=None):
         """Generates a label or a button with the information specified and adds
-        it to the self.main_layout.
+        it to the layout [layout].
 
         Args:
+            layout: layout of the screen the widget belongs to
             label: a flag indicating if the widget being created is a button or
                 a label. If true, it creates a label. Otherwise, it creates a
                 button.
@@ -191,6 +553,9 @@ class MainApp(App):
                 None. If it has None value, than the button will be created with
                 default color (gray).
         
+        Returns:
+            the label or the button created
+
         Requires:
             if the widget being created corresponds to a button, then it is 
                 required that a function is provided.
@@ -200,7 +565,8 @@ class MainApp(App):
 
         if label:
             label = Label(text=text, size_hint_y=None, height=.2*max_height)
-            self.main_layout.add_widget(label)
+            layout.add_widget(label)
+            return label
         
         else:
             if color:
@@ -211,235 +577,427 @@ class MainApp(App):
                 button = Button(text=text, size_hint_y=None, 
                                 height=.2*max_height)
             button.bind(on_press=function)
-            self.main_layout.add_widget(button)
+            layout.add_widget(button)
+            return button
 
 
-    def back_button(self, window: Window, key: int, *args) -> ScrollView:
+    def back_button(self, window: Window, key: int, *args) -> bool:
         """When the back button of the phone is pressed, go back to the
-        main menu.
+        main menu. A game being played is kept, so that it can be resumed.
 
         Args:
             window: current app window
             key: key pressed on the phone
 
         Returns:
-            layout of the application
+            True if the key was handled, so that the app is not closed
         """
         
         if key == 27:
-            self.mplayer.unload()
-            return self.build()
+            self.show_home()
+            return True
 
 
-    def incorrect_button(self, translation: int, pronounciation: bool, 
-                            instance: Button):
-        """When an incorrect solution is pressed, it changes the color of the 
-        button to red. If the question word is in danish, then it pronounces
-        the word.
+    def answer_button(self, instance: Button):
+        """When an option is pressed, answers the question with it. If it is
+        the correct solution, it changes the color of the button to green,
+        pronounces the question word and prepares the next question, which is
+        shown once a second has passed and the word was pronounced. Otherwise,
+        it changes the color of the button to red and, if the question word is
+        in danish, it pronounces the word.
 
         Args:
-            translation: 1 if the question is a danish word and 0 if 
-                it is a translation
-            pronounciation: determi
-            nes if there is an audio file of the 
-                pronounciation of the word 
-            instance: instance of the button that was pressed
+            instance: instance of the option button that was pressed
         """
 
+        if self.gate is not Gate.OPEN or not self.quiz.answerable:
+            return
+
+        option = self.pages[self.page].buttons.index(instance)
+        correct = self.quiz.answer(option)
+        question = self.quiz.question
+        # the texts of the question, since its entry may be gone after a
+        # reload of the words
+        if question.translation == 1:
+            word, meaning = question.question, question.correct
+        else:
+            word, meaning = question.correct, question.question
+        key = entry_key(word, meaning)
+        self.game.answered(question.entry_id, correct, self.quiz.tries)
+        if self.game.scheduler is not None and \
+                question.entry_id in self.game.scheduler.cards:
+            self.cards[key] = self.game.scheduler.cards[question.entry_id]
+        if self.recorder is not None:
+            self.recorder.answer(option, time.time())
+        self.review_log.record(word, meaning, time.time(),
+                                question.translation, correct,
+                                time.perf_counter() - self.question_time)
         instance.background_normal = ""
-        instance.background_color = "red"
-        if translation == 1 and pronounciation:
+        instance.background_color = "green" if correct else "red"
+        if self.pronounciation and self.quiz.pronounce():
             self.mplayer.play()
+        if correct:
+            self.gate = Gate.FEEDBACK
+            self.tap_time = time.perf_counter()
+            self.waiting_delay = True
+            self.waiting_audio = self.pronounciation
+            self.schedule("feedback", self.delay_finished,
+                            self.feedback_delay)
+            self.prepare_next()
+
+
+    def schedule(self, name: str, callback: Callable[[float], None],
+                    delay: float=0):
+        """Schedules [callback] to be called after [delay] seconds as the
+        event [name] of the quiz screen, cancelling the event of that name
+        still pending, so that an event is never called twice.
+
+        Args:
+            name: name of the event
+            callback: function called with the time elapsed
+            delay (optional): seconds until it is called. Defaults to 0.
+        """
+
+        event = self.events.pop(name, None)
+        if event is not None:
+            event.cancel()
+        def call(dt: float):
+            self.events.pop(name, None)
+            callback(dt)
+        self.events[name] = Clock.schedule_once(call, delay)
+
+
+    def cancel_events(self):
+        """Cancels the events of the quiz screen still pending and closes its
+        input, when the screen is left."""
+
+        for event in self.events.values():
+            event.cancel()
+        self.events.clear()
+        self.tap_time = None
+        self.waiting_delay = False
+        self.waiting_audio = False
+        self.gate = Gate.CLOSED
+
+
+    def prepare_next(self):
+        """Makes the next question while the right answer is shown, shows it
+        in the quiz screen that is not shown and loads its pronounciation in
+        the audio player that is not playing, so that only switching them is
+        left when the feedback is over.
+        """
+
+        self.prepared_time = time.time()
+        question = self.quiz.prepare()
+        self.pages[1 - self.page].show(question)
+        if self.spare_loaded:
+            self.spare_player.unload()
+        self.spare_loaded = self.spare_player.load(question.audio)
+        self.prepared = question
 
 
-    def correct_button(self, pronounciation: bool, instance: Button):
-        """When the correct solution is pressed, it changes the color of the 
-        button to green, pronounces the question word, waits a second and 
-        creates a new set of question, correct solution and wrong solutions.
+    def delay_finished(self, dt: float):
+        """Ends the feedback delay of a right answer, and the feedback if the
+        pronounciation is over.
 
         Args:
-            pronounciation: determines if there is an audio file of the 
-                pronounciation of the word
-            instance: instance of the button that was pressed
+            dt: time elapsed since the callback was scheduled
         """
 
-        instance.background_normal = ""
-        instance.background_color = "green"
-        if pronounciation:
-            self.mplayer.play()
-        Clock.schedule_once(lambda dt: self.action(instance, pronounciation), 1)
+        self.waiting_delay = False
+        if not self.waiting_audio:
+            self.advance()
+        else:
+            # in case the end of the pronounciation is not reported
+            self.schedule("feedback",
+                            lambda dt: self.audio_finished(self.mplayer),
+                            self.mplayer.length)
 
 
-    def obtain_words_or_meaning(self) -> tuple:
-        """Picks whether the question will contain the word in danish and the 
-        options will correspond to possible translations or the reverse, then 
-        pick the corresponding question, correct solution and wrong solutions.
+    def audio_finished(self, player: MusicPlayerAndroid):
+        """Ends the pronounciation of the answered question, and the feedback
+        if its delay is over.
 
-        Returns:
-            word_or_meaning (int): 1 if the question is a danish word and 0 if 
-                it is a translation
-            question (str): the word for which we want the translation
-            correct_sol (str): the correct translation of the question word
-            wrong_solutions (list[str]): wrong translations of the question word
+        Args:
+            player: audio player that finished playing
         """
-        
-        word_or_meaning = random.choice((0,1))
 
-        if word_or_meaning == 0:
-            correct_sol, question = random.choice(self.words_meannings)
-        else:
-            question, correct_sol = random.choice(self.words_meannings)
-        
-        wrong_solutions = deque()
-        while len(wrong_solutions) < 3:
-            possible_wrong_solution = random.choice(self.words_meannings)[word_or_meaning]
-            if possible_wrong_solution != correct_sol:
-                wrong_solutions.append(possible_wrong_solution)
-        
-        return (word_or_meaning, question, correct_sol, wrong_solutions)
+        if player is not self.mplayer or not self.waiting_audio:
+            return
+        self.waiting_audio = False
+        if not self.waiting_delay:
+            self.advance()
+
+
+    def advance(self):
+        """Shows the next question once the feedback of the right answer is
+        over. Only the first call after an answer shows it."""
 
+        if self.gate is not Gate.FEEDBACK:
+            return
+        event = self.events.pop("feedback", None)
+        if event is not None:
+            event.cancel()
+        self.action(None)
 
-    def action(self, instance: Button, pronounciation:bool=False) -> ScrollView:
+
+    def action(self, instance: Optional[Button]) -> ScreenManager:
         """Generates instances of the multiple choice game. This consists in
         generating a question word which the user has to translate. If the word
         appears in danish, then the user has to choose one of 4 possible english
         translations. If the question word appears in english, then the user has
         to choose one of 4 danish translations. It is only possible to go to
         another instance of the game, if the user has clicked on the correct
-        answer.
+        answer. A question prepared while the previous answer was shown is
+        shown by switching to the quiz screen and audio player that hold it.
             Additionally, if the question word is in danish, the first time it
-        appears, the sound of its pronounciation will be played when the 
+        appears, the sound of its pronounciation will be played when the
         instance of the game is generated, when an incorrect choice is made and
-        when a correct choice is made. If the question word is in english, 
+        when a correct choice is made. If the question word is in english,
         however, then the sound of the pronounciation of the word in danish is
         only played when the correct option is clicked.
 
         Args:
-            instance: instance of the button the was pressed that triggered 
-                    this function
+            instance: instance of the button the was pressed that triggered
+                    this function, or None after the feedback of an answer
 
         Returns:
-            main_layout: updated version of the layout of the application
+            self.manager: screens of the application
         """
 
-        self.reset_layout()
-        
-        translation, question, corr_sol, wrong_sols = self.obtain_words_or_meaning()
-        
-        filename = rename(f"{question if translation == 1 else corr_sol}.mp3")
-        mp3 = resource_find(filename)
-        
-        if pronounciation:
-            self.mplayer.unload()
-        pronounciation = self.mplayer.load(mp3)
+        if not self.pages:
+            self.pages = [QuizPage(self.answer_button, name=f"quiz{number}")
+                            for number in range(2)]
+            for page in self.pages:
+                self.manager.add_widget(page)
+
+        question = self.quiz.next()
+        if self.recorder is not None:
+            shown = time.time()
+            self.recorder.question(question, shown,
+                                    self.prepared_time
+                                    if question is self.prepared else shown)
+
+        if question is self.prepared:
+            self.page = 1 - self.page
+            self.mplayer, self.spare_player = self.spare_player, self.mplayer
+            self.pronounciation, self.spare_loaded = (self.spare_loaded,
+                                                        self.pronounciation)
+        else:
+            if self.pronounciation:
+                self.mplayer.unload()
+            self.pronounciation = self.mplayer.load(question.audio)
+            self.pages[self.page].show(question)
+        self.prepared = None
 
-        if translation == 1 and pronounciation:
+        if self.pronounciation and self.quiz.pronounce():
             self.mplayer.play()
+        if self.manager.current.startswith("quiz"):
+            self.manager.current = self.pages[self.page].name
+        self.gate = Gate.OPEN
 
-        self.create_widget(True, question)
-        
-        options = [corr_sol, *wrong_sols]
-        random.shuffle(options)
-        for sol in options:
-            if sol == corr_sol:
-                callback = functools.partial(self.correct_button, 
-                                                pronounciation)
-            else:
-                callback = functools.partial(self.incorrect_button, translation, 
-                                                pronounciation)
-            self.create_widget(False, sol, callback)
-        
-        return self.screen
+        self.question_time = time.perf_counter()
+        if self.tap_time is not None:
+            # callbacks scheduled now run after the new question is drawn
+            self.schedule("interactive", self.log_interactive)
+        return self.manager
+
+
+    def log_interactive(self, dt: float):
+        """Logs the time from the tap on the correct answer to the next
+        question being shown and accepting taps.
 
+        Args:
+            dt: time elapsed since the callback was scheduled
+        """
+
+        elapsed = time.perf_counter() - self.tap_time
+        self.tap_time = None
+        Logger.info(f'game: tap to interactive {elapsed*1000:.1f} ms '
+                    f'({(elapsed - self.feedback_delay)*1000:.1f} ms after '
+                    f'the feedback delay)')
 
-    def vocab_done(self, instance: Button) -> ScrollView:
+
+    def vocab_done(self, instance: Button) -> ScreenManager:
         """Proceeds to the multiple choice game with the vocabulary sets chosen,
-        if vocabulary sets have been chosen. Otherwise, it will return to the
-        options layout.
+        if vocabulary sets have been chosen. Otherwise, it stays in the options
+        screen, with a message if the sets chosen have no words. The game
+        left in the home screen, if any, is replaced by the new one.
 
         Args:
             instance: instance of the button the was pressed that triggered this
                 function
 
         Returns:
-            ScrollView: 
+            self.manager: screens of the application
         """
 
-        if len(self.words_meannings) > 0:
-            vocab_to_use = set()
-            for vocab in self.words_meannings:
-                vocab_to_use |= set(self.vocab_groups[vocab])
-            self.words_meannings = list(vocab_to_use)
-            return self.action(instance)
-        
-        return self.vocab_options(instance)
+        if len(self.selected_groups) > 0:
+            try:
+                self.prepare_questions(self.selected_groups)
+            except ValueError as error:
+                message = str(error).capitalize()
+                self.picker_label.text = f"{message}, choose others:"
+                return self.manager
+            self.quiz = QuizEngine(self.next_question)
+            self.action(instance)
+            self.manager.current = self.pages[self.page].name
+        return self.manager
     
     
-    def vocab_choice(self, instance: Button):
-        """Adds the vocabulary set chosen to the vocabulary set that is going
-        to be used in the multiple choice game.
+    def vocab_choice(self, instance: GroupRow):
+        """Adds the vocabulary set chosen to the vocabulary sets that are going
+        to be used in the multiple choice game or, if it was already chosen,
+        removes it.
 
         Args:
-            instance: instance of the button the was pressed that triggered this
+            instance: instance of the row the was pressed that triggered this
                 function
         """
 
-        self.words_meannings.append(instance.text)
-        instance.background_normal = ""
-        instance.background_color = get_color_from_hex("#99ccff")
+        row = self.group_rows[instance.index]
+        row["selected"] = not row["selected"]
+        if row["selected"]:
+            self.selected_groups.add(row["group"])
+            self.selected_rows.add(instance.index)
+        else:
+            self.selected_groups.discard(row["group"])
+            self.selected_rows.discard(instance.index)
+        instance.selected = row["selected"]
 
 
-    def vocab_options(self, instance: Button) -> ScrollView:
-        """Generates the screen that allows the user to choose one or more
-        vocabulary sets to use in the multiple choice game.
+    def update_picker(self):
+        """Rebuilds the data model of the vocabulary set picker from the
+        vocabulary, keeping the sets chosen. The rows only hold the data of
+        the sets, so no widget is created here.
+        """
+
+        self.group_rows = [{"group": group, "selected": group in
+                                self.selected_groups,
+                            "text": f"{group} "
+                                    f"({self.vocab_groups.count(group)})"}
+                            for group in self.vocab_groups.groups()]
+        self.selected_rows = {index for index, row in
+                                enumerate(self.group_rows) if row["selected"]}
+        self.picker.data = self.group_rows
+
+
+    def vocab_options(self, instance: Button) -> ScreenManager:
+        """Shows the screen that allows the user to choose one or more
+        vocabulary sets to use in the multiple choice game. The screen and
+        the data model of its picker are created the first time; afterwards
+        only the sets chosen the last time are cleared, so the screen opens
+        in the same time whatever the number of sets.
 
         Args:
-            instance: instance of the button the was pressed that triggered this
-                function.
+            instance: instance of the button the was pressed that triggered
+                this function.
 
         Returns:
-            self.screen: screen of the application.
+            self.manager: screens of the application
         """
 
-        options = self.vocab_groups.keys()
-        self.words_meannings = []
-        self.reset_layout()
+        self.selected_groups = set()
+        if self.picker is None:
+            layout = self.add_screen("picker")
+            self.picker_label = self.create_widget(layout, True, "")
+            # the picker takes the height left by the label and the buttons
+            self.picker = RecycleView(viewclass=GroupRow,
+                                        effect_cls="ScrollEffect")
+            rows = RecycleBoxLayout(orientation="vertical", size_hint_y=None,
+                                    default_size=(None, .2*Window.height),
+                                    default_size_hint=(1, None))
+            rows.bind(minimum_height=rows.setter("height"))
+            self.picker.add_widget(rows)
+            layout.add_widget(self.picker)
+
+            # button to submit choice of vocabulary
+            self.create_widget(layout, False, "Done", self.vocab_done,
+                                get_color_from_hex("#0b6ac1"))
+
+            # button to create a new vocabulary set
+            self.create_widget(layout, False, "Create a new vocabulary set",
+                                self.vocab_done, get_color_from_hex("#9e83e5"))
+            self.update_picker()
+        else:
+            for index in self.selected_rows:
+                self.group_rows[index]["selected"] = False
+                row = self.picker.view_adapter.get_visible_view(index)
+                if row is not None:
+                    row.selected = False
+            self.selected_rows = set()
 
-        if len(options) > 3:
-            self.main_layout.height += Window.height*(len(options)-2)*0.2
+        self.picker_label.text = "Choose one or more vocabulary sets:"
+        self.manager.current = "picker"
+        return self.manager
 
-        self.create_widget(True, "Choose one or more vocabulary sets:")
-        for option in options:
-            self.create_widget(False, option, self.vocab_choice)
 
-        # button to submit choice of vocabulary
-        self.create_widget(False, "Done", self.vocab_done, 
-                            get_color_from_hex("#0b6ac1"))
-        
-        # button to create a new vocabulary set
-        self.create_widget(False, "Create a new vocabulary set", 
-                            self.vocab_done, get_color_from_hex("#9e83e5"))
-        return self.screen
+    def show_home(self):
+        """Shows the home screen, with the button to resume the game if one
+        is being played.
+        """
+
+        self.cancel_events()
+        playing = self.quiz is not None
+        self.resume_button.disabled = not playing
+        self.resume_button.opacity = 1 if playing else 0
+        self.manager.current = "home"
 
 
-    def build(self) -> ScrollView:
+    def resume(self, instance: Button) -> ScreenManager:
+        """Goes back to the question of the game left in the home screen, as
+        it was left. The time to answer it is counted again from now. If it
+        was left while its right answer was shown, the next question, already
+        prepared, is shown instead.
+
+        Args:
+            instance: instance of the button the was pressed that triggered
+                this function
+
+        Returns:
+            self.manager: screens of the application
+        """
+
+        self.manager.current = self.pages[self.page].name
+        if self.quiz.state is State.ANSWERED_RIGHT:
+            self.gate = Gate.FEEDBACK
+            self.advance()
+        else:
+            self.question_time = time.perf_counter()
+            self.gate = Gate.OPEN
+        return self.manager
+
+
+    def build(self) -> ScreenManager:
         """It creates the layout of the application and presents the first 
-        screen when opening the app and its first options.
+        screen when opening the app and its first options. The other screens
+        are created the first time they are shown.
 
         Returns:
-            self.screen: screen of the application
+            self.manager: screens of the application
         """
 
-        self.reset_layout()
+        home = Screen(name="home")
         inside_layout = FloatLayout()
-        self.main_layout.add_widget(inside_layout)
+        home.add_widget(inside_layout)
 
         button = Button(text="start", size_hint_y=None, color="black", 
                         background_normal="", background_color="yellow", 
                         size_hint=(0.3, 0.2), pos_hint={'x':.35, 'y':.4})
         button.bind(on_press=self.vocab_options)
         inside_layout.add_widget(button)
-        return self.screen
+
+        self.resume_button = Button(text="continue", color="black",
+                                    background_normal="",
+                                    background_color="yellow",
+                                    size_hint=(0.3, 0.2),
+                                    pos_hint={'x':.35, 'y':.15},
+                                    disabled=True, opacity=0)
+        self.resume_button.bind(on_press=self.resume)
+        inside_layout.add_widget(self.resume_button)
+
+        self.manager.add_widget(home)
+        return self.manager
 
 
 
@@ -447,4 +1005,4 @@ class MainApp(App):
 
 if __name__ == '__main__':
     app = MainApp()
-    app.run()
\ No newline at end of file
+    app.run()
@@ -11,6 +11,8 @@ import aiofiles
 
 from typing import List, Set
 
+from vocabulary import read_entries
+
 ###############################################################################
 
 def rename(word: str, reverse: bool=False) -> str:
@@ -58,13 +60,7 @@ def get_words(filename: str) -> dict:
         the set of words will only contain unique words and no empty words
     """
 
-    with open(filename, 'r', encoding='utf8') as datafile:
-        words = {}
-        for wrd in datafile.read().splitlines():
-            if len(wrd) != 0:
-                key, value = tuple(wrd.split("#")[:2])
-                words[key] = value
-    return words
+    return {entry.word: entry.translation for entry in read_entries(filename)}
 
 
 def check_words(all_words: dict) -> Set[str]:
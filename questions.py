@@ -0,0 +1,143 @@
+"""This script corresponds to the preparation of the questions of the multiple
+choice game. The next questions are built in advance by a worker thread, so
+that showing a new question only has to create its widgets.
+"""
+
+import queue
+import random
+import threading
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sampling import DistractorSampler
+
+
+###############################################################################
+# questions
+
+class Question(NamedTuple):
+    """Instance of the multiple choice game, ready to be shown."""
+    # 1 if the question is a danish word and 0 if it is a translation
+    translation: int
+    entry_id: int
+    question: str
+    correct: str
+    # ids and texts of the options, already shuffled
+    options: List[Tuple[int, str]]
+    # path of the pronounciation of the danish word, or None
+    audio: Optional[str]
+
+
+def make_question(pool: Sequence[int], store, distractors: DistractorSampler,
+                    find_audio: Callable[[str], Optional[str]]=(
+                        lambda word: None),
+                    rng: random.Random=random,
+                    entry_id: Optional[int]=None) -> Question:
+    """Picks whether the question will contain the word in danish and the
+    options will correspond to possible translations or the reverse, then
+    picks the question, unless it is given, its correct solution and its
+    wrong solutions.
+
+    Args:
+        pool: ids of the entries of the game
+        store: storage engine of the vocabulary
+        distractors: sampler of the wrong solutions of the pool
+        find_audio (optional): finds the audio file of a danish word. Defaults
+            to a function that never finds it.
+        rng (optional): random generator. Defaults to the random module.
+        entry_id (optional): id of the entry to ask. Defaults to None, in
+            which case it is chosen uniformly from the pool.
+
+    Returns:
+        question, with its options in random order
+    """
+
+    translation = rng.choice((0, 1))
+    if entry_id is None:
+        entry_id = rng.choice(pool)
+    word, meaning = store.entry(entry_id)
+    question, correct = (word, meaning) if translation == 1 else (meaning, word)
+
+    options = [(entry_id, correct), *distractors.pick(entry_id, translation,
+                                                        rng=rng)]
+    rng.shuffle(options)
+    return Question(translation, entry_id, question, correct, options,
+                    find_audio(word))
+
+
+###############################################################################
+# look-ahead queue
+
+class QuestionQueue:
+    """Bounded queue of the next [size] questions, filled by a worker thread
+    with the questions made by [make]. Taking a question only waits for the
+    worker if the queue is empty, which happens when the questions are
+    answered faster than they are made. An exception raised while making a
+    question stops the worker and is raised by get instead.
+    """
+
+    def __init__(self, make: Callable[[], Question], size: int=3):
+        self.make = make
+        self.ready = queue.Queue(maxsize=size)
+        self.stopped = threading.Event()
+        self.worker = threading.Thread(target=self.fill, daemon=True)
+        self.worker.start()
+
+
+    def fill(self):
+        """Makes questions until the queue is closed or a question cannot be
+        made, blocking while the queue is full.
+        """
+
+        while not self.stopped.is_set():
+            try:
+                question = self.make()
+            except Exception as error:
+                self.offer(error)
+                return
+            self.offer(question)
+
+
+    def offer(self, item):
+        """Puts [item] in the queue once there is room, unless the queue is
+        closed in the meantime.
+
+        Args:
+            item: question, or exception raised while making it
+        """
+
+        while not self.stopped.is_set():
+            try:
+                self.ready.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+    def get(self) -> Question:
+        """Takes the next question, waiting for the worker if none is ready,
+        so that the questions are always made by the worker and in the same
+        order.
+
+        Returns:
+            question made in advance
+
+        Raises:
+            Exception: the exception that stopped the worker, once the
+                questions made before it are taken
+        """
+
+        item = self.ready.get()
+        if isinstance(item, Exception):
+            # the worker is stopped, so the next calls must not wait for it
+            self.ready.put(item)
+            raise item
+        return item
+
+
+    def close(self):
+        """Stops the worker and waits for the question it is making, so that
+        the vocabulary can be changed safely afterwards.
+        """
+
+        self.stopped.set()
+        self.worker.join()
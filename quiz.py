@@ -0,0 +1,137 @@
+"""This script corresponds to the rules of the multiple choice game, without
+any widget, so that the game can be played by the app, by a benchmark or by a
+simulated learner in the same way.
+"""
+
+import enum
+from typing import Callable, Optional
+
+from questions import Question
+
+
+###############################################################################
+# states of the game
+
+class State(enum.Enum):
+    """States of a question of the game."""
+    # no question is shown: the game did not start or a question was answered
+    # right and the next one was not asked yet
+    NEXT = "next"
+    # the question is shown and was not answered yet
+    QUESTION = "question"
+    # the question was answered wrong and is still waiting for the right answer
+    ANSWERED_WRONG = "answered wrong"
+    # the question was answered right
+    ANSWERED_RIGHT = "answered right"
+
+
+###############################################################################
+# engine
+
+class QuizEngine:
+    """Multiple choice game over the questions made by [next_question]. A
+    question is asked with next and answered with answer until the right
+    option is chosen, after which the next question can be asked:
+
+        NEXT -> QUESTION -> (ANSWERED_WRONG ->)* ANSWERED_RIGHT -> QUESTION
+
+    The next question can be made in advance with prepare, for instance while
+    the right answer is shown, and is then asked by next.
+    """
+
+    __slots__ = ("next_question", "state", "question", "upcoming", "tries",
+                    "questions", "answers", "mistakes")
+
+    def __init__(self, next_question: Callable[[], Question]):
+        self.next_question = next_question
+        self.state = State.NEXT
+        self.question: Optional[Question] = None
+        # question made in advance by prepare
+        self.upcoming: Optional[Question] = None
+        # options chosen for the current question
+        self.tries = 0
+        self.questions = 0
+        self.answers = 0
+        self.mistakes = 0
+
+
+    def next(self) -> Question:
+        """Asks the next question.
+
+        Returns:
+            question asked
+
+        Raises:
+            RuntimeError: if the current question was not answered right
+        """
+
+        if self.state is not State.NEXT and self.state is not \
+                State.ANSWERED_RIGHT:
+            raise RuntimeError(f"cannot ask a question in state {self.state}")
+        self.question = self.prepare()
+        self.upcoming = None
+        self.questions += 1
+        self.tries = 0
+        self.state = State.QUESTION
+        return self.question
+
+
+    def prepare(self) -> Question:
+        """Makes the next question in advance, without asking it. Calling it
+        again before next returns the same question.
+
+        Returns:
+            question that next will ask
+        """
+
+        if self.upcoming is None:
+            self.upcoming = self.next_question()
+        return self.upcoming
+
+
+    @property
+    def answerable(self) -> bool:
+        """If the current question is waiting for an answer."""
+
+        return self.state is State.QUESTION or \
+                self.state is State.ANSWERED_WRONG
+
+
+    def answer(self, option: int) -> bool:
+        """Answers the current question with the option in position [option].
+
+        Args:
+            option: position of the chosen option
+
+        Returns:
+            True if the option is the right one
+
+        Raises:
+            RuntimeError: if the current question is not waiting for an answer
+        """
+
+        if self.state is not State.QUESTION and self.state is not \
+                State.ANSWERED_WRONG:
+            raise RuntimeError(f"cannot answer in state {self.state}")
+        self.answers += 1
+        self.tries += 1
+        if self.question.options[option][0] == self.question.entry_id:
+            self.state = State.ANSWERED_RIGHT
+            return True
+        self.mistakes += 1
+        self.state = State.ANSWERED_WRONG
+        return False
+
+
+    def pronounce(self) -> bool:
+        """Checks if the pronounciation of the danish word should be played in
+        the current state: when a danish question is shown or answered wrong,
+        and whenever the question is answered right.
+
+        Returns:
+            True if the pronounciation should be played
+        """
+
+        if self.state is State.ANSWERED_RIGHT:
+            return True
+        return self.state is not State.NEXT and self.question.translation == 1
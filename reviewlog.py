@@ -0,0 +1,432 @@
+"""This script corresponds to the record of every answer of the multiple choice
+game. Answers are appended to a binary log of fixed-width records, written and
+synced in batches by a background thread, and the log is folded into a
+snapshot with one summary per entry once it grows, so that reading the
+history at startup only replays the answers since the last snapshot.
+
+Answers are recorded under a key made from the word and translation of their
+entry, and not under its id in the vocabulary store, because the ids change
+when lines are added to the words file and differ between storage engines.
+The word and translation of each entry answered are written once to
+[log].entries, so the history can be found in the store entry by entry,
+without reading the whole vocabulary.
+"""
+
+import os
+import struct
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Tuple
+
+
+###############################################################################
+# formats
+
+LOG_MAGIC = b"DLRL"
+SNAPSHOT_MAGIC = b"DLRS"
+VERSION = 2
+# magic, version and generation of the log, which is increased every time the
+# log is folded into the snapshot
+LOG_HEADER = struct.Struct("<4sHQ")
+# key of the entry, time, direction (1 if the question was a danish word), right
+# answer flag and seconds since the question was shown
+RECORD = struct.Struct("<QdBBf")
+# magic, version, generation of the log that continues the snapshot and
+# number of summaries
+SNAPSHOT_HEADER = struct.Struct("<4sHQQ")
+# key of the entry, answers, right answers, time of the last answer and total
+# seconds to answer
+SUMMARY = struct.Struct("<QIIdd")
+# key of the entry and sizes of its word and translation, which follow it
+TEXT = struct.Struct("<QHH")
+
+
+class Summary:
+    """Answers given to an entry."""
+
+    __slots__ = ("answers", "right", "last", "latency")
+
+    def __init__(self, answers: int=0, right: int=0, last: float=0,
+                    latency: float=0):
+        self.answers = answers
+        self.right = right
+        self.last = last
+        self.latency = latency
+
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean seconds to answer the entry."""
+
+        return self.latency / self.answers if self.answers else 0.0
+
+
+def entry_key(word: str, translation: str) -> int:
+    """Computes the key under which the answers to the entry ([word],
+    [translation]) are recorded, which does not depend on where the entry is
+    in the words file.
+
+    Args:
+        word: danish word
+        translation: translation of the word
+
+    Returns:
+        64 bit hash of the entry
+    """
+
+    digest = hashlib.blake2b(f"{word}#{translation}".encode('utf8'),
+                                digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def fold(summaries: Dict[int, Summary], records: Iterable[tuple]):
+    """Adds the answers [records] to the summaries of their entries.
+
+    Args:
+        summaries: summaries by key of the entries, updated in place
+        records: unpacked records of the log
+    """
+
+    for key, timestamp, _, right, latency in records:
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = Summary()
+        summary.answers += 1
+        summary.right += right
+        summary.last = max(summary.last, timestamp)
+        summary.latency += latency
+
+
+###############################################################################
+# files
+
+def write_atomically(target: str, content: bytes):
+    """Writes and syncs [content] to a temporary file that then replaces
+    [target], so that a crash never leaves half a file.
+
+    Args:
+        target: name of the file
+        content: content of the file
+    """
+
+    temporary = target + ".tmp"
+    with open(temporary, 'wb') as datafile:
+        datafile.write(content)
+        datafile.flush()
+        os.fsync(datafile.fileno())
+    os.replace(temporary, target)
+
+
+def read_snapshot(filename: str) -> Tuple[Dict[int, Summary], int]:
+    """Reads the summaries of a snapshot.
+
+    Args:
+        filename: name of the snapshot
+
+    Returns:
+        summaries by key of the entries and generation of the log that
+            continues the snapshot, which are empty and 0 if there is no
+            valid snapshot
+    """
+
+    try:
+        with open(filename, 'rb') as datafile:
+            content = datafile.read()
+        magic, version, generation, count = SNAPSHOT_HEADER.unpack_from(
+                                                                    content)
+    except (OSError, struct.error):
+        return {}, 0
+    if magic != SNAPSHOT_MAGIC or version != VERSION or \
+            len(content) != SNAPSHOT_HEADER.size + count * SUMMARY.size:
+        return {}, 0
+
+    summaries = {key: Summary(answers, right, last, latency)
+                    for key, answers, right, last, latency in
+                    SUMMARY.iter_unpack(content[SNAPSHOT_HEADER.size:])}
+    return summaries, generation
+
+
+def snapshot_content(summaries: Dict[int, Summary], generation: int) -> bytes:
+    """Encodes the summaries into the content of a snapshot.
+
+    Args:
+        summaries: summaries by key of the entries
+        generation: generation of the log that continues the snapshot
+
+    Returns:
+        content of the snapshot
+    """
+
+    content = bytearray(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, VERSION,
+                                                generation, len(summaries)))
+    for key, summary in summaries.items():
+        content += SUMMARY.pack(key, summary.answers, summary.right,
+                                summary.last, summary.latency)
+    return bytes(content)
+
+
+def read_log(filename: str) -> Tuple[int, bytes]:
+    """Reads the records of a log.
+
+    Args:
+        filename: name of the log
+
+    Returns:
+        generation of the log and its whole records, or -1 and no records if
+            there is no valid log
+
+    Ensures:
+        a record cut by a crash while it was written is left out
+    """
+
+    try:
+        with open(filename, 'rb') as datafile:
+            content = datafile.read()
+        magic, version, generation = LOG_HEADER.unpack_from(content)
+    except (OSError, struct.error):
+        return -1, b""
+    if magic != LOG_MAGIC or version != VERSION:
+        return -1, b""
+
+    records = content[LOG_HEADER.size:]
+    return generation, records[:len(records) - len(records) % RECORD.size]
+
+
+def text_content(key: int, word: str, translation: str) -> bytes:
+    """Encodes the word and translation of the entry [key].
+
+    Args:
+        key: key of the entry
+        word: danish word
+        translation: translation of the word
+
+    Returns:
+        content of the texts of the entry
+    """
+
+    word, translation = word.encode('utf8'), translation.encode('utf8')
+    return TEXT.pack(key, len(word), len(translation)) + word + translation
+
+
+def read_texts(filename: str) -> Tuple[Dict[int, Tuple[str, str]], int]:
+    """Reads the words and translations of the entries answered.
+
+    Args:
+        filename: name of the file of the texts
+
+    Returns:
+        word and translation by key of the entries and size of the file
+            without the entry cut by a crash, if any
+    """
+
+    try:
+        with open(filename, 'rb') as datafile:
+            content = datafile.read()
+    except OSError:
+        return {}, 0
+
+    texts = {}
+    offset = 0
+    while offset + TEXT.size <= len(content):
+        key, word_size, translation_size = TEXT.unpack_from(content, offset)
+        end = offset + TEXT.size + word_size + translation_size
+        if end > len(content):
+            break
+        middle = offset + TEXT.size + word_size
+        texts[key] = (str(content[offset + TEXT.size:middle], 'utf8'),
+                        str(content[middle:end], 'utf8'))
+        offset = end
+    return texts, offset
+
+
+###############################################################################
+# log
+
+class ReviewLog:
+    """Append-only log of the answers of the multiple choice game, next to its
+    snapshot [filename].snapshot and to the texts of its entries
+    [filename].entries. The summaries of the entries are kept up to date in
+    memory, records are written and synced every [batch] answers by
+    a background thread, and after [compact_at] records the log is folded
+    into the snapshot by the same thread.
+    """
+
+    def __init__(self, filename: str, batch: int=32, compact_at: int=4096):
+        """Reads the snapshot and replays the log written after it.
+
+        Args:
+            filename: name of the log
+            batch (optional): number of answers written together. Defaults to
+                32.
+            compact_at (optional): number of records of the log after which
+                it is folded into the snapshot. Defaults to 4096.
+        """
+
+        self.filename = filename
+        self.snapshot = filename + ".snapshot"
+        self.batch = batch
+        self.compact_at = compact_at
+
+        self.summaries, self.generation = read_snapshot(self.snapshot)
+        generation, records = read_log(filename)
+        if generation >= self.generation:
+            # the log continues the snapshot (or the snapshot was lost)
+            self.generation = generation
+            fold(self.summaries, RECORD.iter_unpack(records))
+        else:
+            # no log, or a log folded into the snapshot before a crash
+            records = b""
+        self.records = len(records) // RECORD.size
+
+        if generation != self.generation or os.path.getsize(filename) != \
+                LOG_HEADER.size + len(records):
+            # new log or record cut by a crash
+            write_atomically(filename, LOG_HEADER.pack(LOG_MAGIC, VERSION,
+                                                        self.generation) +
+                                        records)
+
+        self.texts_file = filename + ".entries"
+        self.texts, size = read_texts(self.texts_file)
+        if os.path.exists(self.texts_file) and \
+                os.path.getsize(self.texts_file) != size:
+            # texts cut by a crash
+            os.truncate(self.texts_file, size)
+
+        self.file = open(filename, 'ab')
+        self.texts_writer = open(self.texts_file, 'ab')
+        self.pending = bytearray()
+        self.pending_texts = bytearray()
+        self.writer = ThreadPoolExecutor(max_workers=1)
+
+
+    def record(self, word: str, translation: str, timestamp: float,
+                direction: int, right: bool, latency: float):
+        """Records an answer.
+
+        Args:
+            word: danish word of the entry of the question
+            translation: translation of the word
+            timestamp: time of the answer in seconds since the epoch
+            direction: 1 if the question was a danish word and 0 if it was a
+                translation
+            right: if the answer was right
+            latency: seconds since the question was shown
+        """
+
+        key = entry_key(word, translation)
+        if key not in self.texts:
+            self.texts[key] = (word, translation)
+            self.pending_texts += text_content(key, word, translation)
+        record = (key, timestamp, direction, right, latency)
+        self.pending += RECORD.pack(*record)
+        fold(self.summaries, (record,))
+        if len(self.pending) >= self.batch * RECORD.size:
+            self.flush()
+
+
+    def entry_values(self, store, groups: Iterable[str],
+                        values: Dict[int, Any]) -> Dict[int, Any]:
+        """Obtains the values [values] of the entries of the vocabulary groups
+        [groups], given by key of the entry, by the ids of the entries in the
+        vocabulary store [store]. Each entry is looked up in the store by its
+        word and translation, so the cost depends on the number of values and
+        not on the size of the groups.
+
+        Args:
+            store: storage engine of the vocabulary
+            groups: names of the vocabulary groups
+            values: values by key of the entries, given by entry_key
+
+        Returns:
+            values by id of the entries of the groups that have them
+        """
+
+        groups = list(groups)
+        found = {}
+        for key, value in values.items():
+            if key in self.texts:
+                for entry_id in store.entry_ids(*self.texts[key], groups):
+                    found[entry_id] = value
+        return found
+
+
+    def errors(self, store, groups: Iterable[str]) -> Dict[int, int]:
+        """Obtains the wrong answers to the entries of the vocabulary groups
+        [groups], by their ids in the vocabulary store [store].
+
+        Args:
+            store: storage engine of the vocabulary
+            groups: names of the vocabulary groups
+
+        Returns:
+            number of wrong answers of each entry of the groups that has them
+        """
+
+        return self.entry_values(store, groups, {
+                    key: summary.answers - summary.right
+                    for key, summary in self.summaries.items()
+                    if summary.answers > summary.right})
+
+
+    def flush(self):
+        """Hands the pending answers to the background thread."""
+
+        if self.pending:
+            self.writer.submit(self.write, bytes(self.pending),
+                                bytes(self.pending_texts))
+            self.pending.clear()
+            self.pending_texts.clear()
+
+
+    def write(self, content: bytes, texts: bytes=b""):
+        """Appends and syncs records to the log, after the texts of the
+        entries they are the first answers to, and folds the log into the
+        snapshot if it grew enough. Runs in the background thread.
+
+        Args:
+            content: packed records
+            texts (optional): texts of the entries answered for the first
+                time. Defaults to no texts.
+        """
+
+        if texts:
+            self.texts_writer.write(texts)
+            self.texts_writer.flush()
+            os.fsync(self.texts_writer.fileno())
+        self.file.write(content)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.records += len(content) // RECORD.size
+        if self.records >= self.compact_at:
+            self.compact()
+
+
+    def compact(self):
+        """Folds the log into the snapshot and starts a new, empty log. The
+        snapshot names the new generation before the log is replaced, so a
+        crash in between only leaves a log that is known to be folded. Runs
+        in the background thread.
+        """
+
+        summaries, _ = read_snapshot(self.snapshot)
+        _, records = read_log(self.filename)
+        fold(summaries, RECORD.iter_unpack(records))
+
+        generation = self.generation + 1
+        write_atomically(self.snapshot, snapshot_content(summaries,
+                                                            generation))
+        self.file.close()
+        write_atomically(self.filename, LOG_HEADER.pack(LOG_MAGIC, VERSION,
+                                                        generation))
+        self.file = open(self.filename, 'ab')
+        self.generation = generation
+        self.records = 0
+
+
+    def close(self):
+        """Writes the pending answers and waits for the background thread."""
+
+        self.flush()
+        self.writer.shutdown(wait=True)
+        self.file.close()
+        self.texts_writer.close()
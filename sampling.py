@@ -0,0 +1,305 @@
+"""This script corresponds to the random choices of the multiple choice game:
+which entries are asked and which wrong options are shown with them.
+"""
+
+import random
+import itertools
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+###############################################################################
+# distractors
+
+def permutation(size: int, rng: random.Random=random) -> Iterator[int]:
+    """Yields the positions 0 to [size] - 1 in random order, one at a time,
+    with a partial Fisher-Yates shuffle. Only the swapped positions are
+    stored, so drawing k positions costs O(k) time and memory whatever the
+    size.
+
+    Args:
+        size: number of positions
+        rng (optional): random generator. Defaults to the random module.
+
+    Yields:
+        distinct positions
+    """
+
+    swaps = {}
+    for position in range(size):
+        chosen = rng.randrange(position, size)
+        yield swaps.get(chosen, chosen)
+        swaps[chosen] = swaps.get(position, position)
+
+
+class DistractorSampler:
+    """Picks the wrong options of the questions of a pool of entries. For
+    each side (danish words or translations) it keeps an array with one
+    entry per distinct answer of the pool, built the first time the side is
+    asked, and draws from it without replacement. The options are therefore
+    always distinct, and the draw always ends and only skips the answer of
+    the question and its synonyms.
+    """
+
+    def __init__(self, pool: Sequence[int], store, senses=None):
+        """Prepares the sampler of the pool [pool].
+
+        Args:
+            pool: ids of the entries of the game
+            store: storage engine of the vocabulary
+            senses (optional): sense index of the pool, used to reject
+                synonyms of the question. Defaults to None.
+        """
+
+        self.pool = pool
+        self.store = store
+        self.senses = senses
+        self.answers = [None, None]
+
+
+    def answer_ids(self, side: int) -> Sequence[int]:
+        """Obtains one entry of the pool for each of its distinct answers,
+        as given by the store.
+
+        Args:
+            side: 0 for the danish words and 1 for the translations
+
+        Returns:
+            ids of the entries
+        """
+
+        if self.answers[side] is None:
+            self.answers[side] = self.store.distinct_answers(self.pool, side)
+        return self.answers[side]
+
+
+    def pick(self, entry_id: int, side: int, k: int=3,
+                rng: random.Random=random) -> List[Tuple[int, str]]:
+        """Picks [k] wrong options for the question entry [entry_id].
+
+        Args:
+            entry_id: id of the entry of the question
+            side: 0 if the options are danish words and 1 if they are
+                translations
+            k (optional): number of wrong options. Defaults to 3.
+            rng (optional): random generator. Defaults to the random module.
+
+        Returns:
+            ids and answers of the wrong options. There are fewer than [k] if
+                the pool does not have enough different answers.
+        """
+
+        answers = self.answer_ids(side)
+        correct = self.store.answer_key(entry_id, side)
+        distractors = []
+        for position in permutation(len(answers), rng):
+            other_id = answers[position]
+            if self.store.answer_key(other_id, side) == correct or (
+                    self.senses is not None and
+                    self.senses.synonyms(entry_id, other_id)):
+                continue
+            distractors.append((other_id, self.store.entry(other_id)[side]))
+            if len(distractors) == k:
+                break
+        return distractors
+
+
+###############################################################################
+# weighted choices
+
+class WeightedSampler:
+    """Chooses entries of the pool [pool] with probability proportional to
+    their weight, one plus the number of times they were answered wrong. The
+    weights are kept in a Fenwick tree, so a choice and an update cost
+    O(log n). The sampler can be used by the thread that makes the questions
+    in advance while the answers update it.
+    """
+
+    def __init__(self, pool: Sequence[int],
+                    errors: Optional[Dict[int, int]]=None,
+                    rng: random.Random=random):
+        """Prepares the sampler of the pool [pool].
+
+        Args:
+            pool: ids of the entries of the game
+            errors (optional): wrong answers of the entries in previous
+                games. Defaults to None.
+            rng (optional): random generator. Defaults to the random module.
+        """
+
+        errors = errors or {}
+        self.pool = pool
+        self.rng = rng
+        self.lock = threading.Lock()
+        # positions in the pool of the entries that were chosen or answered
+        # wrong, which are the only ones updated
+        self.positions = {}
+        # tree[i] is the sum of the weights of the positions in
+        # (i - lowbit(i), i], with positions counted from 1
+        self.tree = tree = [0] * (len(pool) + 1)
+        for position, entry_id in enumerate(pool, 1):
+            weight = 1 + errors.get(entry_id, 0)
+            if weight > 1:
+                self.positions[entry_id] = position
+            tree[position] += weight
+            parent = position + (position & -position)
+            if parent < len(tree):
+                tree[parent] += tree[position]
+        self.total = len(pool) + sum(errors.get(entry_id, 0)
+                                        for entry_id in self.positions)
+        self.top = 1 << (len(pool).bit_length() - 1) if pool else 0
+
+
+    def choice(self) -> int:
+        """Chooses an entry.
+
+        Returns:
+            id of the entry
+
+        Requires:
+            the pool is not empty
+        """
+
+        tree = self.tree
+        with self.lock:
+            remaining = self.rng.randrange(self.total)
+            position = 0
+            step = self.top
+            while step:
+                following = position + step
+                if following < len(tree) and tree[following] <= remaining:
+                    position = following
+                    remaining -= tree[following]
+                step >>= 1
+        entry_id = self.pool[position]
+        self.positions[entry_id] = position + 1
+        return entry_id
+
+
+    def weight(self, entry_id: int) -> int:
+        """Obtains the weight of the entry [entry_id].
+
+        Args:
+            entry_id: id of the entry
+
+        Returns:
+            weight of the entry
+
+        Requires:
+            the entry was chosen by the sampler or had wrong answers
+        """
+
+        tree = self.tree
+        position = self.positions[entry_id]
+        weight = tree[position]
+        # subtract the positions of tree[position] before this one
+        below = position - (position & -position)
+        position -= 1
+        while position > below:
+            weight -= tree[position]
+            position -= position & -position
+        return weight
+
+
+    def add(self, entry_id: int, weight: int=1):
+        """Increases the weight of the entry [entry_id], after it was answered
+        wrong.
+
+        Args:
+            entry_id: id of the entry
+            weight (optional): increase of the weight. Defaults to 1.
+
+        Requires:
+            the entry was chosen by the sampler or had wrong answers
+        """
+
+        tree = self.tree
+        position = self.positions[entry_id]
+        with self.lock:
+            self.total += weight
+            while position < len(tree):
+                tree[position] += weight
+                position += position & -position
+
+
+###############################################################################
+# order of the questions
+
+class EpochSampler:
+    """Chooses the entries of the pool [pool] in passes: every entry is chosen
+    once, in random order, before any entry is chosen again. The order of a
+    pass is drawn one entry at a time, so starting a pass costs O(1).
+    """
+
+    def __init__(self, pool: Sequence[int], rng: random.Random=random):
+        self.pool = pool
+        self.rng = rng
+        self.order = iter(())
+        self.passes = 0
+        self.last = None
+
+
+    def choice(self) -> int:
+        """Chooses the next entry of the pass, starting a new pass when every
+        entry was chosen.
+
+        Returns:
+            id of the entry
+
+        Requires:
+            the pool is not empty
+
+        Ensures:
+            the first entry of a pass is not the last entry of the previous
+                pass, unless the pool has a single entry
+        """
+
+        position = next(self.order, None)
+        if position is None:
+            self.passes += 1
+            self.order = permutation(len(self.pool), self.rng)
+            position = next(self.order)
+            if self.pool[position] == self.last and len(self.pool) > 1:
+                position, first = next(self.order), position
+                self.order = itertools.chain((first,), self.order)
+        self.last = self.pool[position]
+        return self.last
+
+
+class RecentGuard:
+    """Last [size] entries asked, in a ring buffer, with the number of times
+    each one is in it, so that checking if an entry was asked recently and
+    adding an entry cost O(1).
+    """
+
+    __slots__ = ("ring", "position", "counts")
+
+    def __init__(self, size: int):
+        self.ring = [None] * size
+        self.position = 0
+        self.counts = {}
+
+
+    def __contains__(self, entry_id: int) -> bool:
+        return entry_id in self.counts
+
+
+    def add(self, entry_id: int):
+        """Adds the entry [entry_id] as the last one asked, forgetting the
+        oldest one if the buffer is full.
+
+        Args:
+            entry_id: id of the entry
+        """
+
+        if not self.ring:
+            return
+        oldest = self.ring[self.position]
+        if oldest is not None:
+            if self.counts[oldest] == 1:
+                del self.counts[oldest]
+            else:
+                self.counts[oldest] -= 1
+        self.ring[self.position] = entry_id
+        self.counts[entry_id] = self.counts.get(entry_id, 0) + 1
+        self.position = (self.position + 1) % len(self.ring)
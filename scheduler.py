@@ -0,0 +1,232 @@
+"""This script corresponds to the spaced repetition mode of the multiple choice
+game, in which the entries that are due for review are asked first, following
+the SM-2 algorithm (https://super-memory.com/english/ol/sm2.htm).
+"""
+
+import heapq
+import random
+import struct
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+from reviewlog import write_atomically
+from sampling import permutation
+
+
+###############################################################################
+# cards
+
+DAY = 24 * 60 * 60
+# seconds until an entry answered wrong is asked again in the same session
+RELEARN_DELAY = 60
+MIN_EASE = 1.3
+
+
+class Card:
+    """Review state of an entry."""
+
+    __slots__ = ("repetitions", "interval", "ease", "due")
+
+    def __init__(self, repetitions: int=0, interval: float=0, ease: float=2.5,
+                    due: float=0):
+        self.repetitions = repetitions
+        self.interval = interval
+        self.ease = ease
+        self.due = due
+
+
+    def review(self, quality: int, now: float):
+        """Updates the card after a review with the SM-2 algorithm.
+
+        Args:
+            quality: quality of the answer, from 0 (forgotten) to 5 (perfect)
+            now: time of the review in seconds
+
+        Ensures:
+            an entry answered with quality below 3 is due again after
+                RELEARN_DELAY seconds
+        """
+
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) *
+                                                (0.08 + (5 - quality) * 0.02))
+        if quality < 3:
+            self.repetitions = 0
+            self.interval = 0
+            self.due = now + RELEARN_DELAY
+            return
+
+        if self.repetitions == 0:
+            self.interval = 1
+        elif self.repetitions == 1:
+            self.interval = 6
+        else:
+            self.interval *= self.ease
+        self.repetitions += 1
+        self.due = now + self.interval * DAY
+
+
+def grade(tries: int) -> int:
+    """Obtains the SM-2 quality of an answer of the multiple choice game.
+
+    Args:
+        tries: number of options chosen until the right one
+
+    Returns:
+        4 if the right option was chosen first, 1 otherwise
+    """
+
+    return 4 if tries == 1 else 1
+
+
+###############################################################################
+# files
+#
+# The review states are kept by key of the entry (reviewlog.entry_key), like
+# the answers of the review log, so they outlive the ids of the store.
+
+CARDS_MAGIC = b"DLRC"
+CARDS_VERSION = 1
+# magic, version and number of cards
+CARDS_HEADER = struct.Struct("<4sHQ")
+# key of the entry, repetitions, interval, ease and due time
+CARD = struct.Struct("<QIddd")
+
+
+def read_cards(filename: str) -> Dict[int, Card]:
+    """Reads the review states of the file [filename].
+
+    Args:
+        filename: name of the file of the review states
+
+    Returns:
+        review states by key of the entries, which are empty if there is no
+            valid file
+    """
+
+    try:
+        with open(filename, 'rb') as datafile:
+            content = datafile.read()
+        magic, version, count = CARDS_HEADER.unpack_from(content)
+    except (OSError, struct.error):
+        return {}
+    if magic != CARDS_MAGIC or version != CARDS_VERSION or \
+            len(content) != CARDS_HEADER.size + count * CARD.size:
+        return {}
+
+    return {key: Card(*state) for key, *state in
+            CARD.iter_unpack(content[CARDS_HEADER.size:])}
+
+
+def write_cards(filename: str, cards: Dict[int, Card]):
+    """Writes the review states [cards] to the file [filename], replacing it
+    atomically.
+
+    Args:
+        filename: name of the file of the review states
+        cards: review states by key of the entries
+    """
+
+    content = bytearray(CARDS_HEADER.pack(CARDS_MAGIC, CARDS_VERSION,
+                                            len(cards)))
+    for key, card in cards.items():
+        content += CARD.pack(key, card.repetitions, card.interval, card.ease,
+                                card.due)
+    write_atomically(filename, bytes(content))
+
+
+###############################################################################
+# scheduler
+
+class Scheduler:
+    """Chooses the entries of the pool [pool] to ask. The reviewed entries are
+    kept in a heap ordered by the time they are due, so choosing an entry and
+    updating it after an answer cost O(log n). When no reviewed entry is due,
+    an entry that was never asked is chosen, in random order, and when every
+    entry was asked, the one due first is asked ahead of time.
+    """
+
+    def __init__(self, pool: Sequence[int],
+                    cards: Optional[Dict[int, Card]]=None,
+                    clock: Callable[[], float]=time.time,
+                    rng: random.Random=random):
+        """Prepares the scheduler of the pool [pool].
+
+        Args:
+            pool: ids of the entries of the game
+            cards (optional): review states of entries from a previous game,
+                which are kept for the entries of the pool. Defaults to None.
+            clock (optional): current time in seconds. Defaults to time.time.
+            rng (optional): random generator. Defaults to the random module.
+        """
+
+        self.pool = pool
+        self.clock = clock
+        self.cards = {}
+        if cards:
+            members = set(pool)
+            self.cards = {entry_id: card for entry_id, card in cards.items()
+                            if entry_id in members}
+        # entries whose due time changed since they were pushed are skipped
+        # when they reach the top
+        self.heap = [(card.due, entry_id)
+                        for entry_id, card in self.cards.items()]
+        heapq.heapify(self.heap)
+        self.unseen = permutation(len(pool), rng)
+        # entry never asked that was chosen and not reviewed yet
+        self.new_entry = None
+
+
+    def next(self) -> int:
+        """Chooses the entry to ask.
+
+        Returns:
+            id of the entry
+
+        Requires:
+            the pool is not empty
+        """
+
+        heap = self.heap
+        while heap and self.cards[heap[0][1]].due != heap[0][0]:
+            heapq.heappop(heap)
+        if heap and heap[0][0] <= self.clock():
+            return heap[0][1]
+
+        if self.new_entry is not None and self.new_entry not in self.cards:
+            return self.new_entry
+        for position in self.unseen:
+            entry_id = self.pool[position]
+            if entry_id not in self.cards:
+                self.new_entry = entry_id
+                return entry_id
+        return heap[0][1]
+
+
+    def chose(self, entry_id: int) -> bool:
+        """Checks if the entry [entry_id] is one the scheduler can have
+        chosen: a reviewed entry or the entry never asked that was chosen
+        last.
+
+        Args:
+            entry_id: id of the entry
+
+        Returns:
+            True if the entry belongs to the pool of the scheduler
+        """
+
+        return entry_id in self.cards or entry_id == self.new_entry
+
+
+    def review(self, entry_id: int, quality: int):
+        """Updates the entry [entry_id] after it was answered.
+
+        Args:
+            entry_id: id of the entry
+            quality: quality of the answer, from 0 (forgotten) to 5 (perfect)
+        """
+
+        card = self.cards.get(entry_id)
+        if card is None:
+            card = self.cards[entry_id] = Card()
+        card.review(quality, self.clock())
+        heapq.heappush(self.heap, (card.due, entry_id))
@@ -0,0 +1,127 @@
+"""This script corresponds to the meanings (senses) of the translations. A
+translation such as "to convey; to handin" has one sense per ";" separated
+part, and two entries are synonyms if their translations share a sense.
+"""
+
+import unicodedata
+from array import array
+from typing import FrozenSet, Iterable, List
+
+
+###############################################################################
+# senses of a translation
+
+def normalize(sense: str) -> str:
+    """Normalizes a sense, so that it can be compared independently of the
+    unicode representation, the case and the spacing.
+
+    Args:
+        sense: sense of a translation
+
+    Returns:
+        normalized sense
+    """
+
+    return " ".join(unicodedata.normalize('NFC', sense).casefold().split())
+
+
+def split_senses(translation: str) -> FrozenSet[str]:
+    """Splits a translation into its normalized senses.
+
+    Args:
+        translation: english translation
+
+    Returns:
+        normalized senses of the translation
+    """
+
+    return frozenset(sense for sense in map(normalize, translation.split(";"))
+                        if sense)
+
+
+###############################################################################
+# index
+
+class SenseIndex:
+    """Index of the senses of the entries [entry_ids] of a vocabulary store.
+    The senses of an entry are split the first time the entry is compared,
+    so checking if two entries are synonyms costs O(1) after that. The
+    inverted index, from senses to entries, is built the first time an
+    english word is looked up.
+    """
+
+    def __init__(self, store, entry_ids: Iterable[int]):
+        self.store = store
+        self.entry_ids = entry_ids
+        self.entry_senses = {}
+        self.inverted = None
+
+
+    def senses(self, entry_id: int) -> FrozenSet[str]:
+        """Obtains the normalized senses of the entry [entry_id].
+
+        Args:
+            entry_id: id of the entry
+
+        Returns:
+            senses of the translation of the entry
+        """
+
+        if entry_id not in self.entry_senses:
+            self.entry_senses[entry_id] = split_senses(
+                                            self.store.entry(entry_id)[1])
+        return self.entry_senses[entry_id]
+
+
+    def synonyms(self, entry_id: int, other_id: int) -> bool:
+        """Checks if two entries share a sense.
+
+        Args:
+            entry_id: id of an entry
+            other_id: id of the other entry
+
+        Returns:
+            True if the translations of the entries share a sense.
+        """
+
+        return not self.senses(entry_id).isdisjoint(self.senses(other_id))
+
+
+    def lookup(self, english: str) -> List[int]:
+        """Finds the entries that have a sense of the english translation
+        [english].
+
+        Args:
+            english: english word or translation
+
+        Returns:
+            ids of the entries, in increasing order
+        """
+
+        if self.inverted is None:
+            self.inverted = {}
+            for entry_id in self.entry_ids:
+                for sense in self.senses(entry_id):
+                    if sense not in self.inverted:
+                        self.inverted[sense] = array('I')
+                    self.inverted[sense].append(entry_id)
+
+        found = set()
+        for sense in split_senses(english):
+            found.update(self.inverted.get(sense, ()))
+        return sorted(found)
+
+
+    def words(self, english: str) -> List[str]:
+        """Finds the danish words that have a sense of the english
+        translation [english].
+
+        Args:
+            english: english word or translation
+
+        Returns:
+            danish words
+        """
+
+        return [self.store.entry(entry_id)[0]
+                for entry_id in self.lookup(english)]
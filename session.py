@@ -0,0 +1,274 @@
+"""This script corresponds to the sessions of the multiple choice game: the
+questions of a game, made with a random generator of its own so that they can
+be made again from its seed, and the recording and replay of the answers
+given in a session.
+"""
+
+import json
+import time
+import random
+import functools
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+from questions import Question, make_question
+from quiz import QuizEngine
+from sampling import (DistractorSampler, EpochSampler, RecentGuard,
+                        WeightedSampler)
+from scheduler import Card, Scheduler, grade
+from senses import SenseIndex
+
+
+###############################################################################
+# games
+
+# times an entry asked recently is drawn again before it is accepted, which
+# only happens when a few entries have most of the weight
+MAX_REDRAWS = 16
+
+class Game:
+    """Questions of a game over the vocabulary groups [groups] of a store.
+    Every random choice of the game (the entries, the directions, the wrong
+    options and their order) is made by a generator seeded with [seed]. In
+    the random and weighted modes, the entries among the last [recent] asked
+    are drawn again.
+    """
+
+    def __init__(self, store, groups: Iterable[str], mode: str="random",
+                    seed: Optional[int]=None, recent: int=0,
+                    errors: Optional[Dict[int, int]]=None,
+                    cards: Optional[Dict[int, Card]]=None,
+                    clock: Callable[[], float]=time.time,
+                    find_audio: Callable[[str], Optional[str]]=(
+                        lambda word: None)):
+        """Selects the entries of the game.
+
+        Args:
+            store: storage engine of the vocabulary
+            groups: names of the vocabulary groups of the game
+            mode (optional): how the entries are asked: "random" (uniformly),
+                "epoch" (each entry once per pass), "weighted" (more often
+                the more they were answered wrong) or "spaced" (spaced
+                repetition). Defaults to "random".
+            seed (optional): seed of the random generator. Defaults to None,
+                in which case a new seed is drawn.
+            recent (optional): number of last entries that are not asked
+                again. Defaults to 0.
+            errors (optional): wrong answers of the entries in previous
+                games, used by the weighted mode. Defaults to None.
+            cards (optional): review states of the entries in previous games,
+                used by the spaced mode. Defaults to None.
+            clock (optional): current time in seconds. Defaults to time.time.
+            find_audio (optional): finds the audio file of a danish word.
+                Defaults to a function that never finds it.
+
+        Raises:
+            ValueError: if the vocabulary sets have no entries
+        """
+
+        self.groups = sorted(groups)
+        self.mode = mode
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.pool = store.select(self.groups)
+        if len(self.pool) == 0:
+            raise ValueError("the vocabulary sets chosen have no words")
+        self.distractors = DistractorSampler(self.pool, store,
+                                                SenseIndex(store, self.pool))
+        self.make = functools.partial(make_question, self.pool, store,
+                                        self.distractors, find_audio, self.rng)
+
+        self.recent = recent
+        self.guard = RecentGuard(max(0, min(recent, len(self.pool) - 1)))
+
+        self.scheduler = None
+        self.weights = None
+        self.choose = lambda: self.rng.choice(self.pool)
+        if mode == "spaced":
+            self.scheduler = Scheduler(self.pool, cards, clock, self.rng)
+            self.choose = self.scheduler.next
+        elif mode == "weighted":
+            self.weights = WeightedSampler(self.pool, errors, self.rng)
+            self.choose = self.weights.choice
+        elif mode == "epoch":
+            self.choose = EpochSampler(self.pool, self.rng).choice
+
+
+    def next_question(self) -> Question:
+        """Makes the next question of the game.
+
+        Returns:
+            question, with its options in random order
+        """
+
+        entry_id = self.choose()
+        if self.mode == "random" or self.mode == "weighted":
+            for _ in range(MAX_REDRAWS):
+                if entry_id not in self.guard:
+                    break
+                entry_id = self.choose()
+        self.guard.add(entry_id)
+        return self.make(entry_id=entry_id)
+
+
+    def answered(self, entry_id: int, correct: bool, tries: int):
+        """Updates the choice of the next entries after an answer.
+
+        Args:
+            entry_id: id of the entry of the question
+            correct: if the answer was right
+            tries: number of options chosen for the question, this one
+                included
+        """
+
+        # the question may belong to the game before a reload of the words
+        if not correct and self.weights is not None and \
+                entry_id in self.weights.positions:
+            self.weights.add(entry_id)
+        if correct and self.scheduler is not None and \
+                self.scheduler.chose(entry_id):
+            self.scheduler.review(entry_id, grade(tries))
+
+
+###############################################################################
+# recording
+
+class SessionRecorder:
+    """Records the questions and answers of a session of the game [game],
+    together with what is needed to make its questions again: the seed, the
+    mode, the groups and the state of the entries from previous games.
+    """
+
+    def __init__(self, game: Game, look_ahead: int=0):
+        """Starts recording a session.
+
+        Args:
+            game: game of the session, before any question is made
+            look_ahead (optional): number of questions made in advance by
+                questions.QuestionQueue, 0 if they are made when asked.
+                Defaults to 0.
+        """
+
+        self.recording = {
+            "seed": game.seed,
+            "mode": game.mode,
+            "recent": game.recent,
+            "groups": game.groups,
+            "look_ahead": look_ahead,
+            "errors": [] if game.weights is None else [
+                            [entry_id, game.weights.weight(entry_id) - 1]
+                            for entry_id in game.weights.positions],
+            "cards": [] if game.scheduler is None else [
+                            [entry_id, card.repetitions, card.interval,
+                                card.ease, card.due]
+                            for entry_id, card in game.scheduler.cards.items()],
+            "questions": [],
+        }
+
+
+    def question(self, question: Question, timestamp: float,
+                    made: Optional[float]=None):
+        """Records a question shown.
+
+        Args:
+            question: question
+            timestamp: time it was shown in seconds
+            made (optional): time it was made in seconds, when it was made
+                before it was shown, which is when the spaced mode chose its
+                entry. Defaults to None, in which case it is [timestamp].
+        """
+
+        self.recording["questions"].append([
+            timestamp, question.entry_id, question.translation, [],
+            timestamp if made is None else made])
+
+
+    def answer(self, option: int, timestamp: float):
+        """Records an answer to the last question shown.
+
+        Args:
+            option: position of the chosen option
+            timestamp: time of the answer in seconds
+        """
+
+        # answers to a question of the game before a reload are left out
+        if self.recording["questions"]:
+            self.recording["questions"][-1][3].append([timestamp, option])
+
+
+    def save(self, filename: str):
+        """Writes the recording to the file [filename].
+
+        Args:
+            filename: name of the file
+        """
+
+        with open(filename, 'w', encoding='utf8') as datafile:
+            json.dump(self.recording, datafile)
+
+
+def load_recording(filename: str) -> dict:
+    """Reads a recording written by SessionRecorder.save.
+
+    Args:
+        filename: name of the file
+
+    Returns:
+        recording
+    """
+
+    with open(filename, 'r', encoding='utf8') as datafile:
+        return json.load(datafile)
+
+
+###############################################################################
+# replay
+
+def replay(recording: dict, store) -> QuizEngine:
+    """Plays a recorded session again at full speed, answering each question
+    with the recorded options at the recorded times. The questions made in
+    advance by the app are made in the same order, which reproduces the
+    session as long as the worker of the app kept its queue full.
+
+    Args:
+        recording: recording of the session
+        store: storage engine of the vocabulary the session was played with
+
+    Returns:
+        quiz engine after the last answer
+
+    Raises:
+        ValueError: if a question differs from the recorded one
+    """
+
+    now = [0.0]
+    errors = dict(recording["errors"])
+    cards = {entry_id: Card(*state) for entry_id, *state in recording["cards"]}
+    game = Game(store, recording["groups"], recording["mode"],
+                recording["seed"], recording["recent"], errors, cards,
+                lambda: now[0])
+
+    # QuestionQueue keeps look_ahead questions in the queue and one more in
+    # the worker, waiting for room, which is made as soon as one is taken
+    ahead = deque()
+    def next_question() -> Question:
+        while len(ahead) <= recording["look_ahead"]:
+            ahead.append(game.next_question())
+        question = ahead.popleft()
+        ahead.append(game.next_question())
+        return question
+
+    engine = QuizEngine(next_question if recording["look_ahead"]
+                        else game.next_question)
+    for number, (shown, entry_id, direction, answers, *made) in enumerate(
+                                                    recording["questions"]):
+        # the clock of the spaced mode when the entry was chosen
+        now[0] = made[0] if made else shown
+        question = engine.next()
+        if question.entry_id != entry_id or question.translation != direction:
+            raise ValueError(f"replay differs at question {number}")
+        for answered, option in answers:
+            now[0] = answered
+            correct = engine.answer(option)
+            game.answered(entry_id, correct, engine.tries)
+    return engine
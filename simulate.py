@@ -0,0 +1,228 @@
+"""This script simulates learners playing the multiple choice game for months,
+to see how the ways of choosing the entries (random, weighted and spaced)
+behave on large decks before they are changed in the app. Each learner is
+simulated by a separate process, and the results of each simulated day are
+written to a CSV file per learner as they are obtained. It is not shipped
+with the app.
+
+Usage:
+    python simulate.py words.txt results --mode spaced --days 90
+    python simulate.py --synthetic 100000 results --learners 8
+"""
+
+import os
+import csv
+import math
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from deck import load_words
+from quiz import QuizEngine
+from questions import Question
+from session import Game
+
+
+###############################################################################
+# learner model
+
+# seconds a new entry is remembered after it is seen, with a 37% chance
+FIRST_STABILITY = 600
+# growth of the time an entry is remembered after it is recalled
+GROWTH = 3.0
+# seconds to answer a question
+ANSWER_TIME = 5
+
+
+class Learner:
+    """Simulated learner with an exponential forgetting curve per entry: an
+    entry seen [elapsed] seconds ago is recalled with probability
+    exp(-elapsed / stability). The stability grows when the entry is
+    recalled and is reset when it is forgotten. An entry that is not
+    recalled is guessed among the options not chosen yet.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.stability: Dict[int, float] = {}
+        self.last: Dict[int, float] = {}
+
+
+    def recall(self, entry_id: int, now: float) -> float:
+        """Computes the probability of recalling the entry [entry_id].
+
+        Args:
+            entry_id: id of the entry
+            now: current time in seconds
+
+        Returns:
+            probability of recalling the entry, 0 if it was never seen
+        """
+
+        if entry_id not in self.last:
+            return 0.0
+        return math.exp(-(now - self.last[entry_id]) /
+                            self.stability[entry_id])
+
+
+    def answer(self, question: Question, tried: set, now: float) -> int:
+        """Chooses an option of the question [question].
+
+        Args:
+            question: question
+            tried: positions of the options already chosen
+            now: current time in seconds
+
+        Returns:
+            position of the chosen option
+        """
+
+        entry_id = question.entry_id
+        if not tried and self.rng.random() < self.recall(entry_id, now):
+            self.stability[entry_id] *= GROWTH
+        else:
+            if not tried:
+                self.stability[entry_id] = FIRST_STABILITY
+            options = [option for option in range(len(question.options))
+                        if option not in tried]
+            option = self.rng.choice(options)
+            if question.options[option][0] != entry_id:
+                return option
+        self.last[entry_id] = now
+        return next(option for option, (option_id, _) in
+                    enumerate(question.options) if option_id == entry_id)
+
+
+###############################################################################
+# simulation
+
+def simulate(source: str, output: str, mode: str, learner: int, days: int,
+                per_day: int) -> Dict[str, float]:
+    """Simulates a learner that answers [per_day] questions a day for [days]
+    days and writes the results of each day to [output]/[mode]-[learner].csv.
+
+    Args:
+        source: name of the words file
+        output: directory of the results
+        mode: how the entries are asked: "random", "epoch", "weighted" or
+            "spaced"
+        learner: number of the learner, which is the seed of the simulation
+        days: number of days
+        per_day: number of questions a day
+
+    Returns:
+        totals of the simulation
+    """
+
+    store = load_words(source)
+    now = [0.0]
+    game = Game(store, store.groups(), mode, seed=learner,
+                clock=lambda: now[0])
+    engine = QuizEngine(game.next_question)
+    model = Learner(random.Random(learner))
+
+    start = time.perf_counter()
+    filename = os.path.join(output, f"{mode}-{learner}.csv")
+    with open(filename, 'w', newline='') as results:
+        writer = csv.writer(results)
+        writer.writerow(["day", "questions", "first_try", "seen", "retention",
+                            "known"])
+        recalls = []
+        for day in range(days):
+            now[0] = day * 24 * 60 * 60
+            first_try = 0
+            for _ in range(per_day):
+                question = engine.next()
+                tried = set()
+                while True:
+                    option = model.answer(question, tried, now[0])
+                    correct = engine.answer(option)
+                    game.answered(question.entry_id, correct, engine.tries)
+                    now[0] += ANSWER_TIME
+                    if correct:
+                        break
+                    tried.add(option)
+                first_try += not tried
+
+            recalls = [model.recall(entry_id, now[0])
+                        for entry_id in model.last]
+            writer.writerow([day, per_day, first_try, len(recalls),
+                                f"{sum(recalls) / max(len(recalls), 1):.4f}",
+                                sum(recall >= 0.9 for recall in recalls)])
+            results.flush()
+
+    return {"questions": engine.questions, "answers": engine.answers,
+            "seconds": time.perf_counter() - start,
+            "retention": sum(recalls) / max(len(recalls), 1),
+            "known": sum(recall >= 0.9 for recall in recalls)}
+
+
+def main(arguments: Optional[list]=None):
+    """Simulates learners as given by the command line [arguments] and
+    prints the throughput and the learning metrics of each mode.
+
+    Args:
+        arguments (optional): command line arguments. Defaults to None, in
+            which case sys.argv is used.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("source", nargs="?", help="words file")
+    parser.add_argument("output", help="directory of the results")
+    parser.add_argument("--synthetic", type=int, metavar="LINES",
+                        help="simulate a synthetic deck of this many lines")
+    parser.add_argument("--mode", action="append",
+                        choices=("random", "epoch", "weighted", "spaced"),
+                        help="mode to simulate (default: every mode)")
+    parser.add_argument("--learners", type=int, default=4,
+                        help="learners per mode")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=200,
+                        help="questions a day")
+    parser.add_argument("--workers", type=int, help="number of processes")
+    options = parser.parse_args(arguments)
+    if options.learners < 1:
+        parser.error("--learners must be at least 1")
+
+    os.makedirs(options.output, exist_ok=True)
+    source = options.source
+    if options.synthetic:
+        from benchmark import synthetic_words
+        source = os.path.join(options.output, "synthetic.txt")
+        synthetic_words(source, options.synthetic)
+    elif source is None:
+        parser.error("a words file or --synthetic is required")
+    # compiled once, before the processes read it
+    load_words(source)
+
+    modes = options.mode or ["random", "epoch", "weighted", "spaced"]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(options.workers) as executor:
+        futures = {(mode, learner): executor.submit(
+                        simulate, source, options.output, mode, learner,
+                        options.days, options.per_day)
+                    for mode in modes for learner in range(options.learners)}
+        totals = {key: future.result() for key, future in futures.items()}
+    elapsed = time.perf_counter() - start
+
+    for mode in modes:
+        results = [totals[mode, learner]
+                    for learner in range(options.learners)]
+        questions = sum(result["questions"] for result in results)
+        seconds = sum(result["seconds"] for result in results)
+        retention = sum(result["retention"] for result in results)
+        known = sum(result["known"] for result in results)
+        print(f"{mode:<9} {questions / seconds:9.0f} questions/s per process"
+                f"   retention {retention / len(results):.3f}"
+                f"   known entries {known / len(results):9.1f}")
+    questions = sum(result["questions"] for result in totals.values())
+    print(f"{questions} questions in {elapsed:.1f} s "
+            f"({questions / elapsed:.0f} questions/s overall)")
+
+
+###############################################################################
+
+if __name__ == '__main__':
+    main()
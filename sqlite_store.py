@@ -0,0 +1,404 @@
+"""This script corresponds to the SQLite storage engine of the vocabulary. The
+vocabulary is kept in an indexed database next to the words file, so that the
+multiple choice game only fetches the entries it actually shows instead of
+holding the whole vocabulary in memory.
+"""
+
+import os
+import bisect
+import sqlite3
+import functools
+import itertools
+from array import array
+from collections.abc import Sequence
+from typing import List, Iterable
+
+from deck import find_words, file_digest, matches_source
+from vocabulary import Entry
+from senses import normalize
+
+
+###############################################################################
+# database
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE groups (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES groups (id),
+    position INTEGER NOT NULL,
+    danish TEXT NOT NULL,
+    english TEXT NOT NULL,
+    english_norm TEXT NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE UNIQUE INDEX entries_group ON entries (group_id, position);
+CREATE INDEX entries_danish ON entries (danish);
+CREATE INDEX entries_english ON entries (english_norm);
+"""
+
+
+def database_path(filename: str) -> str:
+    """Obtains the name of the database of the words file [filename].
+
+    Args:
+        filename: name of the words file
+
+    Returns:
+        name of the database file
+    """
+
+    return os.path.splitext(filename)[0] + ".sqlite"
+
+
+def build_database(source: str, target: str):
+    """Creates the database [target] with the vocabulary of the words file
+    [source]. The indexes are created after the bulk insert and the database
+    is built in a temporary file that replaces [target] when it is complete.
+
+    Args:
+        source: name of the words file
+        target: name of the database file
+    """
+
+    temporary = target + ".tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+
+    stat = os.stat(source)
+    connection = sqlite3.connect(temporary)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                                    [("size", stat.st_size),
+                                    ("mtime", stat.st_mtime_ns),
+                                    ("digest", file_digest(source))])
+            for group_id, (group, entries) in enumerate(
+                                            find_words(source).items()):
+                connection.execute("INSERT INTO groups VALUES (?, ?, ?)",
+                                    (group_id, group, len(entries)))
+                connection.executemany(
+                    "INSERT INTO entries (group_id, position, danish, "
+                    "english, english_norm) VALUES (?, ?, ?, ?, ?)",
+                    ((group_id, position, danish, english, normalize(english))
+                        for position, (danish, english) in enumerate(entries)))
+            connection.executescript(INDEXES)
+    finally:
+        connection.close()
+    os.replace(temporary, target)
+
+
+###############################################################################
+# storage engine
+
+class SQLitePool(Sequence):
+    """Ids of the entries of the chosen vocabulary groups. Each id is fetched
+    from the database with an indexed query when it is accessed, so
+    random.choice can pick from the pool without loading it.
+        Entries present in more than one of the chosen groups appear once per
+    group.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, group_ids: List[int],
+                    sizes: List[int]):
+        self.connection = connection
+        self.group_ids = group_ids
+        self.ends = list(itertools.accumulate(sizes))
+
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pool index out of range")
+
+        group = bisect.bisect_right(self.ends, index)
+        position = index - (self.ends[group - 1] if group else 0)
+        return self.connection.execute(
+            "SELECT id FROM entries WHERE group_id = ? AND position = ?",
+            (self.group_ids[group], position)).fetchone()[0]
+
+
+class SQLiteStore:
+    """Storage engine that keeps the vocabulary in an SQLite database indexed
+    by group, danish word and normalized english translation.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+
+    @classmethod
+    def open(cls, filename: str) -> "SQLiteStore":
+        """Opens the database of the words file [filename], (re)building it
+        if it does not correspond to the current content of the words file.
+
+        Args:
+            filename: name of the words file
+
+        Returns:
+            storage engine of the vocabulary
+        """
+
+        target = database_path(filename)
+        if not cls.is_fresh(target, filename):
+            build_database(filename, target)
+        return cls(sqlite3.connect(target, check_same_thread=False))
+
+
+    @staticmethod
+    def is_fresh(target: str, source: str) -> bool:
+        """Checks if the database [target] corresponds to the current content
+        of the words file [source].
+
+        Args:
+            target: name of the database file
+            source: name of the words file
+
+        Returns:
+            True if the database can be used as is.
+        """
+
+        if not os.path.exists(target):
+            return False
+        connection = sqlite3.connect(target)
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError:
+            return False
+        finally:
+            connection.close()
+        return matches_source(source, meta["size"], meta["mtime"],
+                                meta["digest"], functools.partial(
+                                    SQLiteStore.refresh_mtime, target))
+
+
+    @staticmethod
+    def refresh_mtime(target: str, mtime: int):
+        """Records the mtime [mtime] of the words file in the database
+        [target]. A database that cannot be written is left as is.
+
+        Args:
+            target: name of the database file
+            mtime: modification time of the words file in nanoseconds
+        """
+
+        connection = sqlite3.connect(target)
+        try:
+            with connection:
+                connection.execute(
+                    "UPDATE meta SET value = ? WHERE key = 'mtime'", (mtime,))
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+
+
+    def groups(self) -> List[str]:
+        """Obtains the names of the vocabulary groups.
+
+        Returns:
+            names of the vocabulary groups
+        """
+
+        return [name for name, in self.connection.execute(
+                    "SELECT name FROM groups ORDER BY id")]
+
+
+    def count(self, group: str) -> int:
+        """Obtains the number of entries of the vocabulary group [group].
+
+        Args:
+            group: name of the vocabulary group
+
+        Returns:
+            number of entries of the group
+        """
+
+        return self.connection.execute(
+            "SELECT size FROM groups WHERE name = ?", (group,)).fetchone()[0]
+
+
+    def select(self, groups: Iterable[str]) -> SQLitePool:
+        """Obtains the ids of the entries of the vocabulary groups [groups].
+
+        Args:
+            groups: names of the vocabulary groups chosen
+
+        Returns:
+            lazy pool of the ids of the entries
+        """
+
+        group_ids, sizes = [], []
+        for group in dict.fromkeys(groups):
+            group_id, size = self.connection.execute(
+                "SELECT id, size FROM groups WHERE name = ?", (group,)
+                ).fetchone()
+            group_ids.append(group_id)
+            sizes.append(size)
+        return SQLitePool(self.connection, group_ids, sizes)
+
+
+    def entry(self, entry_id: int) -> tuple:
+        """Obtains the word and translation of the entry [entry_id].
+
+        Args:
+            entry_id: id of the entry
+
+        Returns:
+            the word and its translation
+        """
+
+        return self.connection.execute(
+            "SELECT danish, english FROM entries WHERE id = ?", (entry_id,)
+            ).fetchone()
+
+
+    def answer_key(self, entry_id: int, side: int) -> str:
+        """Obtains a key of the word or of the translation of the entry
+        [entry_id] that is equal for equal strings.
+
+        Args:
+            entry_id: id of the entry
+            side: 0 for the word and 1 for the translation
+
+        Returns:
+            the word or the translation
+        """
+
+        return self.entry(entry_id)[side]
+
+
+    def distinct_answers(self, pool: SQLitePool, side: int) -> array:
+        """Obtains one entry of the pool [pool] for each of its distinct words
+        or translations, the one with the smallest id, with a single grouped
+        query.
+
+        Args:
+            pool: ids of the entries of the chosen vocabulary groups
+            side: 0 for the words and 1 for the translations
+
+        Returns:
+            ids of the entries
+        """
+
+        column = ("danish", "english")[side]
+        marks = ", ".join("?" * len(pool.group_ids))
+        return array('Q', (entry_id for entry_id, in self.connection.execute(
+                    f"SELECT MIN(id) FROM entries WHERE group_id IN ({marks}) "
+                    f"GROUP BY {column}", pool.group_ids)))
+
+
+    def entry_ids(self, word: str, translation: str, groups: Iterable[str]
+                    ) -> List[int]:
+        """Finds the entry ([word], [translation]) among the entries of the
+        vocabulary groups [groups], with the index of the danish words.
+
+        Args:
+            word: danish word
+            translation: translation of the word
+            groups: names of the vocabulary groups
+
+        Returns:
+            ids of the entry, one for each of the groups that has it
+        """
+
+        groups = list(groups)
+        marks = ", ".join("?" * len(groups))
+        return [entry_id for entry_id, in self.connection.execute(
+                    "SELECT entries.id FROM entries JOIN groups "
+                    "ON groups.id = group_id WHERE danish = ? AND "
+                    f"english = ? AND name IN ({marks})",
+                    (word, translation, *groups))]
+
+
+    def apply(self, removed: Iterable[Entry], added: Iterable[Entry]):
+        """Applies a change of the words file to the database. A removed entry
+        is replaced by the last entry of its group, so the positions of each
+        group stay contiguous. The database is rebuilt on the next start
+        because it no longer matches the words file.
+
+        Args:
+            removed: entries that were removed from the words file
+            added: entries that were added to the words file
+        """
+
+        execute = self.connection.execute
+        with self.connection:
+            for word, translation, group in removed:
+                row = execute(
+                    "SELECT entries.id, group_id, position, size "
+                    "FROM entries JOIN groups ON groups.id = group_id "
+                    "WHERE danish = ? AND english = ? AND name = ?",
+                    (word, translation, group)).fetchone()
+                if row is None:
+                    continue
+                entry_id, group_id, position, size = row
+                execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+                execute("UPDATE entries SET position = ? "
+                        "WHERE group_id = ? AND position = ?",
+                        (position, group_id, size - 1))
+                execute("UPDATE groups SET size = ? WHERE id = ?",
+                        (size - 1, group_id))
+
+            for word, translation, group in added:
+                execute("INSERT OR IGNORE INTO groups (name, size) "
+                        "VALUES (?, 0)", (group,))
+                group_id, size = execute(
+                    "SELECT id, size FROM groups WHERE name = ?", (group,)
+                    ).fetchone()
+                if execute("SELECT 1 FROM entries WHERE danish = ? AND "
+                            "english = ? AND group_id = ?",
+                            (word, translation, group_id)).fetchone():
+                    continue
+                execute("INSERT INTO entries (group_id, position, danish, "
+                        "english, english_norm) VALUES (?, ?, ?, ?, ?)",
+                        (group_id, size, word, translation,
+                            normalize(translation)))
+                execute("UPDATE groups SET size = ? WHERE id = ?",
+                        (size + 1, group_id))
+
+
+    def translations(self, word: str) -> List[str]:
+        """Obtains the translations of the danish word [word].
+
+        Args:
+            word: danish word
+
+        Returns:
+            english translations of the word
+        """
+
+        return [english for english, in self.connection.execute(
+                    "SELECT english FROM entries WHERE danish = ?", (word,))]
+
+
+    def words(self, gloss: str) -> List[str]:
+        """Obtains the danish words whose translation is [gloss], ignoring
+        case and spacing.
+
+        Args:
+            gloss: english translation
+
+        Returns:
+            danish words with that translation
+        """
+
+        return [danish for danish, in self.connection.execute(
+                    "SELECT danish FROM entries WHERE english_norm = ?",
+                    (normalize(gloss),))]
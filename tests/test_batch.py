@@ -0,0 +1,82 @@
+"""This script corresponds to the tests of the batches of questions, which
+must follow the rules of the questions made one at a time by the app.
+"""
+
+import os
+import random
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch import batch_questions, deck_arrays
+from deck import Deck, compile_words
+from sampling import DistractorSampler
+from senses import SenseIndex
+
+LINES = ["hus#house; home#A", "hjem#home#A", "bolig#dwelling; house#A",
+         "bil#car#A", "vogn#car; wagon#A", "kat#cat#B", "hund#dog#B",
+         "fugl#bird#B", "fisk#fish#B", "ko#cow#B", "hest#horse#B",
+         "bil#automobile#B"]
+
+
+@pytest.fixture
+def deck(tmp_path) -> Deck:
+    filename = os.path.join(tmp_path, "words.txt")
+    with open(filename, 'w', encoding='utf8') as datafile:
+        datafile.write("".join(f"{line}\n" for line in LINES))
+    return Deck(compile_words(filename))
+
+
+def test_rules_of_the_options(deck):
+    pool = deck.select(deck.groups())
+    senses = SenseIndex(deck, pool)
+    entries, directions, distractors = batch_questions(
+        deck_arrays(pool, deck), 5_000, seed=1)
+
+    for entry_id, direction, options in zip(entries.tolist(),
+                                            directions.tolist(),
+                                            distractors.tolist()):
+        answer = deck.entry(entry_id)[direction]
+        texts = [deck.entry(option)[direction] for option in options
+                    if option >= 0]
+        assert len(set(texts)) == len(texts)
+        assert answer not in texts
+        assert not any(senses.synonyms(entry_id, option)
+                        for option in options if option >= 0)
+
+
+def test_same_seed_same_batch(deck):
+    arrays = deck_arrays(deck.select(deck.groups()), deck)
+    first = batch_questions(arrays, 1_000, seed=7)
+    again = batch_questions(arrays, 1_000, seed=7)
+    other = batch_questions(arrays, 1_000, seed=8)
+    assert all(np.array_equal(a, b) for a, b in zip(first, again))
+    assert not all(np.array_equal(a, b) for a, b in zip(first, other))
+
+
+def test_options_of_the_app_and_of_the_batch(deck):
+    pool = deck.select(deck.groups())
+    size = 20_000
+    entries, directions, distractors = batch_questions(
+        deck_arrays(pool, deck), size, seed=0)
+    batch_counts = Counter(
+        (entry_id, direction, option)
+        for entry_id, direction, options in zip(
+            entries.tolist(), directions.tolist(), distractors.tolist())
+        for option in options)
+
+    sampler = DistractorSampler(pool, deck, SenseIndex(deck, pool))
+    rng = random.Random(0)
+    app_counts = Counter()
+    for entry_id, direction in zip(entries.tolist(), directions.tolist()):
+        for option, _ in sampler.pick(entry_id, direction, rng=rng):
+            app_counts[(entry_id, direction, option)] += 1
+        app_counts[(entry_id, direction, -1)] += 3 - len(
+            sampler.pick(entry_id, direction, rng=rng))
+
+    # same frequency of every option of every question, within sampling
+    # error
+    for key in batch_counts.keys() | app_counts.keys():
+        assert abs(batch_counts[key] - app_counts[key]) <= 60, key
@@ -0,0 +1,138 @@
+"""This script corresponds to the tests of the compiled deck and of the
+changes of the words file applied to it by a reload, which must leave it
+equal to a deck compiled from the changed file.
+"""
+
+import os
+import random
+import itertools
+
+import pytest
+
+import deck as deck_module
+from deck import Deck, compile_words, deck_path, is_fresh, load_words
+from vocabulary import Entry, WordsWatcher
+
+GROUPS = "ABCD"
+
+
+def write_words(filename: str, lines):
+    with open(filename, 'w', encoding='utf8') as datafile:
+        datafile.write("".join(f"{line}\n" for line in lines))
+
+
+def compiled(tmp_path, lines) -> Deck:
+    filename = os.path.join(tmp_path, "words.txt")
+    write_words(filename, lines)
+    return Deck(compile_words(filename))
+
+
+def contents(deck: Deck, ids) -> list:
+    return sorted(deck.entry(entry_id) for entry_id in ids)
+
+
+def test_compiled_deck(tmp_path):
+    deck = compiled(tmp_path, ["hus#house#A", "bil#car#A", "hus#house#B",
+                                "kat#cat#B"])
+    assert deck.groups() == ["A", "B"]
+    assert deck.count("A") == 2
+    assert contents(deck, deck.select(["A", "B"])) == [
+        ("bil", "car"), ("hus", "house"), ("kat", "cat")]
+    assert deck.find("hus", "house") is not None
+    assert deck.find("hus", "car") is None
+    assert deck.find("abe", "monkey") is None
+
+
+def test_readded_pair_keeps_its_id(tmp_path):
+    deck = compiled(tmp_path, ["hus#house#A", "bil#car#B"])
+    entry_id = deck.find("hus", "house")
+    deck.apply([], [Entry("hus", "house", "B"), Entry("hus", "house", "C")])
+    assert deck.has("B", entry_id) and deck.has("C", entry_id)
+    assert list(deck.select(["A", "B", "C"])).count(entry_id) == 1
+
+    deck.apply([Entry("hus", "house", "A")], [])
+    assert not deck.has("A", entry_id)
+    assert deck.count("A") == 0
+    assert deck.find("hus", "house") == entry_id
+
+
+def test_added_strings_share_answer_keys(tmp_path):
+    deck = compiled(tmp_path, ["hus#house#A"])
+    deck.apply([], [Entry("hus", "home", "B"), Entry("abe", "monkey", "B"),
+                    Entry("abe", "ape", "A")])
+    house, home = deck.find("hus", "house"), deck.find("hus", "home")
+    monkey, ape = deck.find("abe", "monkey"), deck.find("abe", "ape")
+    assert deck.answer_key(house, 0) == deck.answer_key(home, 0)
+    assert deck.answer_key(monkey, 0) == deck.answer_key(ape, 0)
+    assert deck.answer_key(monkey, 0) != deck.answer_key(house, 0)
+    assert len(deck.distinct_answers(deck.select(["A", "B"]), 0)) == 2
+
+
+def test_mtime_is_refreshed_after_a_hash_match(tmp_path, monkeypatch):
+    filename = os.path.join(tmp_path, "words.txt")
+    write_words(filename, ["hus#house#A"])
+    load_words(filename)
+    # the words file unpacked again, with the same content
+    os.utime(filename, ns=(0, 12345))
+    hashed = []
+    digest = deck_module.file_digest
+    monkeypatch.setattr(deck_module, "file_digest",
+                        lambda source: hashed.append(source) or digest(source))
+
+    assert is_fresh(deck_path(filename), filename)
+    assert is_fresh(deck_path(filename), filename)
+    assert len(hashed) == 1
+
+    write_words(filename, ["hus#home#A"])
+    os.utime(filename, ns=(0, 12345))
+    assert not is_fresh(deck_path(filename), filename)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_apply_matches_a_fresh_compile(tmp_path, seed):
+    rng = random.Random(seed)
+
+    def line():
+        return (f"ord{rng.randrange(25)}#word{rng.randrange(25)}#"
+                f"{rng.choice(GROUPS)}")
+
+    filename = os.path.join(tmp_path, "words.txt")
+    lines = [line() for _ in range(60)]
+    write_words(filename, lines)
+    deck = Deck(compile_words(filename))
+    unions = [groups for size in (1, 2, 3)
+                for groups in itertools.combinations(GROUPS, size)]
+    # memoized unions are patched by apply instead of being rebuilt
+    for groups in unions:
+        deck.select(groups)
+
+    watcher = WordsWatcher(filename)
+    for step in range(60):
+        for _ in range(rng.randint(1, 4)):
+            if lines and rng.random() < 0.4:
+                lines.pop(rng.randrange(len(lines)))
+            elif lines and rng.random() < 0.5:
+                word, translation, _ = rng.choice(lines).split("#")
+                lines.insert(rng.randrange(len(lines) + 1),
+                                f"{word}#{translation}#{rng.choice(GROUPS)}")
+            else:
+                lines.insert(rng.randrange(len(lines) + 1), line())
+        write_words(filename, lines)
+        os.utime(filename, ns=(0, step + 1))
+        deck.apply(*watcher.poll())
+
+        fresh = Deck(compile_words(filename))
+        for group in fresh.groups():
+            assert deck.count(group) == fresh.count(group)
+            assert contents(deck, deck.members(group)) == \
+                contents(fresh, fresh.members(group))
+        for groups in unions:
+            present = [group for group in groups if group in fresh.index]
+            if present:
+                assert contents(deck, deck.select(present)) == \
+                    contents(fresh, fresh.select(present))
+
+        pairs = [deck.entry(entry_id) for group in deck.groups()
+                    for entry_id in set(deck.members(group))]
+        assert all(deck.find(*pair) is not None for pair in pairs)
+        assert len({deck.find(*pair) for pair in pairs}) == len(set(pairs))
@@ -0,0 +1,52 @@
+"""This script corresponds to the tests of the errors of the importer, which
+are reported as command line errors.
+"""
+
+import os
+
+import pytest
+
+from deck import Deck
+from importer import main
+
+
+def write(directory, name: str, content: str) -> str:
+    filename = os.path.join(directory, name)
+    with open(filename, 'w', encoding='utf8') as datafile:
+        datafile.write(content)
+    return filename
+
+
+@pytest.mark.parametrize("name, content, options", [
+    ("cards.csv", "ord,word\nhus,house\n", ["--header", "--word", "danish"]),
+    ("anki.txt", "#separator:tab\n#deck column:2\nhus\tDeck\n",
+        ["--format", "anki"]),
+    ("anki.txt", "#separator:tab\nhus\thouse\n",
+        ["--format", "anki", "--word", "front"]),
+    ("anki.txt", "#separator:tab\n#deck column:last\nhus\thouse\n",
+        ["--format", "anki"]),
+])
+def test_errors(tmp_path, capsys, name, content, options):
+    source = write(tmp_path, name, content)
+    target = os.path.join(tmp_path, "cards.deck")
+    with pytest.raises(SystemExit) as exit_info:
+        main([source, target, *options])
+    assert exit_info.value.code == 2
+    assert "error:" in capsys.readouterr().err
+    assert not os.path.exists(target)
+
+
+def test_missing_source(tmp_path):
+    with pytest.raises(SystemExit):
+        main([os.path.join(tmp_path, "none.csv"),
+                os.path.join(tmp_path, "cards.deck")])
+
+
+def test_import(tmp_path):
+    source = write(tmp_path, "anki.txt", "#separator:tab\n#deck column:3\n"
+                                            "hus\thouse\tHome\n")
+    target = os.path.join(tmp_path, "cards.deck")
+    main([source, target, "--format", "anki"])
+    deck = Deck.open(target)
+    assert deck.groups() == ["Home"]
+    assert deck.entry(deck.find("hus", "house")) == ("hus", "house")
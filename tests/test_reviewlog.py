@@ -0,0 +1,158 @@
+"""This script corresponds to the tests of the review log: replaying it after
+a crash and folding it into its snapshot.
+"""
+
+import os
+
+import pytest
+
+from deck import open_store
+from reviewlog import (LOG_HEADER, LOG_MAGIC, RECORD, VERSION, ReviewLog,
+                        entry_key, fold, read_log, read_snapshot, read_texts,
+                        snapshot_content, write_atomically)
+
+HOUSE = entry_key("hus", "house")
+CAR = entry_key("bil", "car")
+
+
+@pytest.fixture
+def filename(tmp_path) -> str:
+    return os.path.join(tmp_path, "reviews.log")
+
+
+def answers(log: ReviewLog) -> dict:
+    return {key: (summary.answers, summary.right)
+            for key, summary in log.summaries.items()}
+
+
+def test_entry_key():
+    assert entry_key("hus", "house") == HOUSE
+    assert HOUSE != CAR
+
+
+def test_replay(filename):
+    log = ReviewLog(filename, batch=2)
+    log.record("hus", "house", 1.0, 1, True, 2.0)
+    log.record("bil", "car", 2.0, 0, False, 3.0)
+    log.record("hus", "house", 3.0, 0, False, 4.0)
+    log.close()
+
+    log = ReviewLog(filename)
+    assert answers(log) == {HOUSE: (2, 1), CAR: (1, 0)}
+    assert log.summaries[HOUSE].last == 3.0
+    assert log.summaries[HOUSE].mean_latency == 3.0
+    log.close()
+
+
+def test_record_cut_by_a_crash(filename):
+    log = ReviewLog(filename)
+    log.record("hus", "house", 1.0, 1, True, 2.0)
+    log.close()
+    with open(filename, 'ab') as datafile:
+        datafile.write(RECORD.pack(CAR, 2.0, 1, True, 2.0)[:7])
+
+    log = ReviewLog(filename)
+    assert answers(log) == {HOUSE: (1, 1)}
+    assert os.path.getsize(filename) == LOG_HEADER.size + RECORD.size
+    log.record("bil", "car", 3.0, 1, False, 2.0)
+    log.close()
+
+    log = ReviewLog(filename)
+    assert answers(log) == {HOUSE: (1, 1), CAR: (1, 0)}
+    log.close()
+
+
+def test_compaction(filename):
+    log = ReviewLog(filename, batch=1, compact_at=3)
+    for timestamp in range(4):
+        log.record("hus", "house", timestamp, 1, timestamp % 2, 1.0)
+    log.close()
+
+    generation, records = read_log(filename)
+    summaries, snapshot_generation = read_snapshot(filename + ".snapshot")
+    assert generation == snapshot_generation == 1
+    assert len(records) == RECORD.size
+    assert summaries[HOUSE].answers == 3
+
+    log = ReviewLog(filename)
+    assert answers(log) == {HOUSE: (4, 2)}
+    log.close()
+
+
+def test_crash_between_snapshot_and_new_log(filename):
+    log = ReviewLog(filename, batch=1)
+    log.record("hus", "house", 1.0, 1, True, 2.0)
+    log.record("bil", "car", 2.0, 1, False, 2.0)
+    log.close()
+    # the snapshot of the next generation was written, the log was not
+    # replaced yet
+    _, records = read_log(filename)
+    summaries, _ = read_snapshot(filename + ".snapshot")
+    fold(summaries, RECORD.iter_unpack(records))
+    write_atomically(filename + ".snapshot", snapshot_content(summaries, 1))
+
+    log = ReviewLog(filename)
+    assert answers(log) == {HOUSE: (1, 1), CAR: (1, 0)}
+    assert read_log(filename) == (1, b"")
+    log.close()
+
+
+def test_lost_snapshot(filename):
+    log = ReviewLog(filename, batch=1, compact_at=2)
+    for timestamp in range(3):
+        log.record("hus", "house", timestamp, 1, True, 1.0)
+    log.close()
+    os.remove(filename + ".snapshot")
+
+    log = ReviewLog(filename)
+    assert answers(log) == {HOUSE: (1, 1)}
+    log.close()
+
+
+def test_other_version_is_discarded(filename):
+    write_atomically(filename, LOG_HEADER.pack(LOG_MAGIC, VERSION - 1, 0) +
+                                RECORD.pack(HOUSE, 1.0, 1, True, 2.0))
+    log = ReviewLog(filename)
+    assert log.summaries == {}
+    assert read_log(filename) == (0, b"")
+    log.close()
+
+
+@pytest.mark.parametrize("engine", ["deck", "sqlite"])
+def test_errors(tmp_path, filename, engine):
+    words = os.path.join(tmp_path, "words.txt")
+    with open(words, 'w') as datafile:
+        datafile.write("abe#monkey#A\nhus#house#A\nbil#car#A\nhus#house#B\n")
+    store = open_store(words, engine)
+    log = ReviewLog(filename, batch=1)
+    log.record("hus", "house", 1.0, 1, False, 2.0)
+    log.record("hus", "house", 2.0, 1, False, 2.0)
+    log.record("bil", "car", 3.0, 1, True, 2.0)
+    log.record("kat", "cat", 4.0, 1, False, 2.0)
+    log.close()
+
+    # the texts of the entries are read again with the log
+    log = ReviewLog(filename)
+    errors = log.errors(store, ["A"])
+    assert [(store.entry(entry_id), wrong)
+            for entry_id, wrong in errors.items()] == [(("hus", "house"), 2)]
+    assert len(log.errors(store, ["A", "B"])) == \
+        (1 if engine == "deck" else 2)
+    assert log.errors(store, ["C"]) == {}
+    log.close()
+
+
+def test_texts_cut_by_a_crash(filename):
+    log = ReviewLog(filename, batch=1)
+    log.record("hus", "house", 1.0, 1, False, 2.0)
+    log.record("bil", "car", 2.0, 1, False, 2.0)
+    log.close()
+    with open(filename + ".entries", 'r+b') as datafile:
+        datafile.truncate(os.path.getsize(filename + ".entries") - 2)
+
+    log = ReviewLog(filename, batch=1)
+    assert log.texts == {HOUSE: ("hus", "house")}
+    log.record("bil", "car", 3.0, 1, False, 2.0)
+    log.close()
+    assert read_texts(filename + ".entries")[0] == {
+        HOUSE: ("hus", "house"), CAR: ("bil", "car")}
@@ -0,0 +1,60 @@
+"""This script corresponds to the tests of the choice of the entries weighted
+by their wrong answers, kept in a Fenwick tree.
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from sampling import WeightedSampler
+
+
+def check_tree(sampler: WeightedSampler, weights: dict):
+    """Checks that every node of the tree sums the weights of its range."""
+
+    pool = sampler.pool
+    for position in range(1, len(sampler.tree)):
+        below = position - (position & -position)
+        assert sampler.tree[position] == sum(
+            weights[pool[index]] for index in range(below, position))
+    assert sampler.total == sum(weights[entry_id] for entry_id in pool)
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 8, 13, 100])
+def test_weights_after_adds(size):
+    rng = random.Random(size)
+    pool = [10 * number + 3 for number in range(size)]
+    errors = {entry_id: rng.randrange(4) for entry_id in pool[::3]}
+    sampler = WeightedSampler(pool, errors, rng)
+    weights = {entry_id: 1 + errors.get(entry_id, 0) for entry_id in pool}
+    check_tree(sampler, weights)
+
+    for _ in range(3 * size):
+        entry_id = sampler.choice()
+        assert sampler.weight(entry_id) == weights[entry_id]
+        if rng.random() < 0.5:
+            increase = rng.randint(1, 3)
+            sampler.add(entry_id, increase)
+            weights[entry_id] += increase
+            assert sampler.weight(entry_id) == weights[entry_id]
+    check_tree(sampler, weights)
+    for entry_id in sampler.positions:
+        assert sampler.weight(entry_id) == weights[entry_id]
+
+
+def test_choices_are_proportional_to_the_weights():
+    pool = list(range(100, 111))
+    sampler = WeightedSampler(pool, {100: 9, 105: 4, 110: 1},
+                                random.Random(0))
+    # an entry answered wrong in this game
+    sampler.add(105, 5)
+    weights = {entry_id: 1 for entry_id in pool}
+    weights.update({100: 10, 105: 10, 110: 2})
+    total = sum(weights.values())
+
+    draws = 100_000
+    counts = Counter(sampler.choice() for _ in range(draws))
+    for entry_id in pool:
+        expected = weights[entry_id] / total
+        assert abs(counts[entry_id] / draws - expected) < 0.01, entry_id
@@ -0,0 +1,39 @@
+"""This script corresponds to the tests of the review states of the spaced
+repetition mode, which are kept across games and restarts.
+"""
+
+import os
+
+from scheduler import Card, Scheduler, read_cards, write_cards
+
+
+def test_cards_round_trip(tmp_path):
+    filename = os.path.join(tmp_path, "reviews.cards")
+    assert read_cards(filename) == {}
+    write_cards(filename, {7: Card(2, 6, 2.36, 1e9), 2**64 - 1: Card()})
+
+    cards = read_cards(filename)
+    assert sorted(cards) == [7, 2**64 - 1]
+    card = cards[7]
+    assert (card.repetitions, card.interval, card.ease, card.due) == (
+        2, 6, 2.36, 1e9)
+
+
+def test_truncated_cards_are_discarded(tmp_path):
+    filename = os.path.join(tmp_path, "reviews.cards")
+    write_cards(filename, {7: Card(2, 6, 2.36, 1e9)})
+    with open(filename, 'r+b') as datafile:
+        datafile.truncate(os.path.getsize(filename) - 1)
+    assert read_cards(filename) == {}
+
+
+def test_review_of_an_entry_the_scheduler_did_not_choose():
+    scheduler = Scheduler([10, 11, 12], {11: Card(1, 1, 2.5, 0)},
+                            clock=lambda: 100)
+    assert scheduler.next() == 11
+    assert scheduler.chose(11)
+    assert not scheduler.chose(99)
+
+    scheduler.cards[11].due = 1e9
+    entry_id = scheduler.next()
+    assert entry_id in (10, 12) and scheduler.chose(entry_id)
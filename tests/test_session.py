@@ -0,0 +1,126 @@
+"""This script corresponds to the tests of the sessions of the game: a session
+played with the timing of the app, recorded and saved, must replay to the
+same questions.
+"""
+
+import os
+import time
+import random
+
+import pytest
+
+from deck import Deck, compile_words
+from questions import QuestionQueue
+from quiz import QuizEngine
+from scheduler import Card
+from session import Game, SessionRecorder, load_recording, replay
+
+MODES = ["random", "epoch", "weighted", "spaced"]
+
+
+@pytest.fixture
+def deck(tmp_path) -> Deck:
+    filename = os.path.join(tmp_path, "words.txt")
+    with open(filename, 'w', encoding='utf8') as datafile:
+        datafile.write("".join(f"ord{number}#word{number}#{'ABC'[number % 3]}\n"
+                                for number in range(40)))
+    return Deck(compile_words(filename))
+
+
+def history(deck: Deck) -> dict:
+    """Wrong answers and review states of previous games."""
+
+    pool = deck.select(["A", "B"])
+    return {"errors": {pool[0]: 5, pool[3]: 2},
+            "cards": {pool[1]: Card(1, 1, 2.5, 0),
+                        pool[4]: Card(2, 6, 2.2, 90)}}
+
+
+def play(game: Game, engine: QuizEngine, recorder: SessionRecorder,
+            now: list, seed: int, questions: int=80, wait=lambda: None):
+    """Plays a session with the timing of the app: the next question is made
+    as soon as the right answer is tapped and shown after the feedback, and
+    the entries of the spaced mode can become due in between.
+    """
+
+    rng = random.Random(seed)
+    made = None
+    for _ in range(questions):
+        question = engine.next()
+        wait()
+        recorder.question(question, now[0], made)
+        while True:
+            now[0] += rng.uniform(0.5, 30)
+            option = rng.randrange(len(question.options))
+            correct = engine.answer(option)
+            recorder.answer(option, now[0])
+            game.answered(question.entry_id, correct, engine.tries)
+            if correct:
+                break
+        made = now[0]
+        engine.prepare()
+        now[0] += rng.choice((1, 61))
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_record_and_replay(tmp_path, deck, mode):
+    for seed in range(5):
+        now = [0.0]
+        game = Game(deck, ["A", "B"], mode, seed=seed, recent=3,
+                    clock=lambda: now[0], **history(deck))
+        engine = QuizEngine(game.next_question)
+        recorder = SessionRecorder(game)
+        play(game, engine, recorder, now, seed)
+
+        filename = os.path.join(tmp_path, f"{mode}-{seed}.json")
+        recorder.save(filename)
+        replayed = replay(load_recording(filename), deck)
+        assert (replayed.questions, replayed.answers, replayed.mistakes) == (
+            engine.questions, engine.answers, engine.mistakes)
+
+
+@pytest.mark.parametrize("mode", ["random", "epoch", "weighted"])
+def test_record_and_replay_with_questions_made_in_advance(deck, mode):
+    look_ahead = 3
+    now = [0.0]
+    game = Game(deck, ["A", "B", "C"], mode, seed=1, recent=3,
+                clock=lambda: now[0], **history(deck))
+    made = [0]
+
+    def make():
+        made[0] += 1
+        return game.next_question()
+
+    questions = QuestionQueue(make, look_ahead)
+    engine = QuizEngine(questions.get)
+    recorder = SessionRecorder(game, look_ahead)
+
+    def wait():
+        # the worker refills the queue and makes one more question, which
+        # waits for room, before the question is answered
+        deadline = time.monotonic() + 5
+        while made[0] < engine.questions + look_ahead + 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+
+    try:
+        play(game, engine, recorder, now, 1, questions=40, wait=wait)
+    finally:
+        questions.close()
+    replayed = replay(recorder.recording, deck)
+    assert replayed.questions == engine.questions
+
+
+def test_replay_detects_a_different_session(deck):
+    game = Game(deck, ["A"], "random", seed=3)
+    engine = QuizEngine(game.next_question)
+    recorder = SessionRecorder(game)
+    play(game, engine, recorder, [0.0], 3, questions=5)
+    recorder.recording["seed"] = 4
+    with pytest.raises(ValueError):
+        replay(recorder.recording, deck)
+
+
+def test_game_without_words(deck):
+    with pytest.raises(ValueError):
+        Game(deck, [], "random")
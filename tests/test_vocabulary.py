@@ -0,0 +1,88 @@
+"""This script corresponds to the tests of the changes of the words file found
+by diff_lines and reported by WordsWatcher.
+"""
+
+import os
+import random
+
+from vocabulary import Entry, WordsWatcher, diff_lines
+
+
+def content(lines) -> bytes:
+    return "".join(f"{line}\n" for line in lines).encode('utf8')
+
+
+def test_unchanged():
+    lines = ["hus#house#A", "bil#car#A"]
+    assert diff_lines(content(lines), content(lines)) == ([], [])
+
+
+def test_changed_line():
+    old = ["hus#house#A", "bil#car#A", "kat#cat#B"]
+    new = ["hus#house#A", "bil#automobile#A", "kat#cat#B"]
+    assert diff_lines(content(old), content(new)) == (["bil#car#A"],
+                                                        ["bil#automobile#A"])
+
+
+def test_change_inside_a_line_of_the_common_suffix():
+    # the changed bytes are at the end of the line, which is also how the
+    # next line ends
+    old = ["hus#house#A", "bil#car#A"]
+    new = ["hus#house#B", "bil#car#A"]
+    assert diff_lines(content(old), content(new)) == (["hus#house#A"],
+                                                        ["hus#house#B"])
+
+
+def test_added_and_removed_at_the_ends():
+    old = content(["hus#house#A", "bil#car#A"])
+    assert diff_lines(old, old + b"kat#cat#B") == ([], ["kat#cat#B"])
+    assert diff_lines(old, b"kat#cat#B\n" + old) == ([], ["kat#cat#B"])
+    assert diff_lines(old, b"") == (["hus#house#A", "bil#car#A"], [])
+
+
+def test_line_still_elsewhere_is_not_removed():
+    old = ["hus#house#A", "bil#car#A", "kat#cat#B", "bil#car#A"]
+    new = ["hus#house#A", "kat#cat#B", "bil#car#A"]
+    assert diff_lines(content(old), content(new)) == ([], [])
+
+
+def test_many_lines_removed():
+    old = [f"ord{i}#word{i}#A" for i in range(200)]
+    new = old[:10] + old[150:]
+    removed, added = diff_lines(content(old), content(new))
+    assert sorted(removed) == sorted(old[10:150])
+    assert added == []
+
+
+def test_random_edits():
+    rng = random.Random(0)
+    for _ in range(300):
+        old = [f"ord{rng.randrange(40)}#word#A"
+                for _ in range(rng.randrange(20))]
+        new = list(old)
+        for _ in range(rng.randint(1, 3)):
+            if new and rng.random() < 0.5:
+                new.pop(rng.randrange(len(new)))
+            else:
+                new.insert(rng.randrange(len(new) + 1),
+                            f"ord{rng.randrange(40)}#word#A")
+
+        removed, added = diff_lines(content(old), content(new))
+        assert set(removed) == set(old) - set(new)
+        # a line moved within the changed region is reported as added again
+        assert set(new) - set(old) <= set(added) <= set(new)
+
+
+def test_watcher(tmp_path):
+    filename = os.path.join(tmp_path, "words.txt")
+    with open(filename, 'wb') as datafile:
+        datafile.write(content(["hus#house#A", "bil#car#A"]))
+    watcher = WordsWatcher(filename)
+    assert watcher.poll() is None
+
+    with open(filename, 'wb') as datafile:
+        datafile.write(content(["hus#house#A", "kat#cat#B", ""]))
+    os.utime(filename, ns=(0, watcher.mtime + 1))
+    assert watcher.poll() == ([Entry("bil", "car", "A")],
+                                [Entry("kat", "cat", "B")])
+    assert watcher.poll() is None
@@ -0,0 +1,205 @@
+"""This script corresponds to the parsing of the words file, shared by the
+application and by the script that obtains the pronounciation of the words.
+"""
+
+import os
+import sys
+from collections import Counter
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+
+###############################################################################
+# entries of the words file
+
+class Entry(NamedTuple):
+    """Line of the words file: a danish word, its translation and the
+    vocabulary group it belongs to.
+    """
+    word: str
+    translation: str
+    group: str
+
+
+def parse_line(line: str) -> Optional[Entry]:
+    """Parses a line of the words file. The name of the group is interned, so
+    that every entry of a group shares the same string.
+
+    Args:
+        line: line of the words file, with or without the line break
+
+    Returns:
+        entry of the line or None if the line is empty
+
+    Ensures:
+        the group is the last field of the line and it is empty if the line
+            only has the word and its meaning
+    """
+
+    fields = line.rstrip("\r\n").split("#")
+    if len(fields) > 2:
+        # tuple.__new__ skips the argument handling of Entry(...), which
+        # dominates the cost of large files
+        return tuple.__new__(Entry, (fields[0], fields[1],
+                                        sys.intern(fields[-1])))
+    if len(fields[0]) != 0:
+        return tuple.__new__(Entry, (fields[0],
+                                        fields[1] if len(fields) > 1 else "",
+                                        ""))
+    return None
+
+
+def read_entries(filename: str) -> Iterator[Entry]:
+    """Reads the words file [filename] one line at a time and yields its
+    entries, so that the memory used does not grow with the size of the file.
+
+    Args:
+        filename: name of the file that has the words and their respective
+            translations
+
+    Yields:
+        entries of the file, in the order they appear
+
+    Requires:
+        filename must correspond to a valid file
+        different words in file [filename] must be in separate lines
+        words must be separated from their meaning, and the meaning from the
+            vocabulary group, by a # character
+
+    Ensures:
+        empty lines are skipped
+    """
+
+    with open(filename, 'r', encoding='utf8') as datafile:
+        yield from filter(None, map(parse_line, datafile))
+
+
+###############################################################################
+# changes of the words file
+
+# contents are compared in chunks, which run in C, and only the chunk with
+# the first difference is searched byte by byte
+CHUNK = 1 << 16
+FEW_LINES = 16
+
+
+def common_prefix(old: bytes, new: bytes) -> int:
+    """Computes the length of the common prefix of [old] and [new].
+
+    Args:
+        old: previous content of the words file
+        new: current content of the words file
+
+    Returns:
+        number of leading bytes the contents share
+    """
+
+    size = min(len(old), len(new))
+    start = 0
+    while start < size and old[start:start + CHUNK] == new[start:start + CHUNK]:
+        start += CHUNK
+    while start < size and old[start] == new[start]:
+        start += 1
+    return min(start, size)
+
+
+def common_suffix(old: bytes, new: bytes, limit: int) -> int:
+    """Computes the length of the common suffix of [old] and [new], up to
+    [limit] bytes.
+
+    Args:
+        old: previous content of the words file
+        new: current content of the words file
+        limit: maximum length of the suffix
+
+    Returns:
+        number of trailing bytes the contents share
+    """
+
+    length = 0
+    while length < limit:
+        step = min(CHUNK, limit - length)
+        if old[len(old) - length - step:len(old) - length] != \
+                new[len(new) - length - step:len(new) - length]:
+            break
+        length += step
+    else:
+        return limit
+    while length < limit and \
+            old[len(old) - length - 1] == new[len(new) - length - 1]:
+        length += 1
+    return length
+
+
+def diff_lines(old: bytes, new: bytes) -> Tuple[List[str], List[str]]:
+    """Finds the lines removed from and added to the words file. Only the
+    lines between the common prefix and the common suffix of the two contents
+    are split and compared, so the work depends on the size of the edit.
+
+    Args:
+        old: previous content of the words file
+        new: current content of the words file
+
+    Returns:
+        lines that were removed and lines that were added
+    """
+
+    prefix = common_prefix(old, new)
+    suffix = common_suffix(old, new, min(len(old), len(new)) - prefix)
+    start = old.rfind(b"\n", 0, prefix) + 1
+
+    # extend the changed region to the end of the line, which is at the
+    # same distance in both contents because it is in the common suffix
+    line_end = old.find(b"\n", len(old) - suffix)
+    extra = suffix if line_end == -1 else line_end + 1 - (len(old) - suffix)
+    old_lines = Counter(old[start:len(old) - suffix + extra].decode(
+                                                        'utf8').splitlines())
+    new_lines = Counter(new[start:len(new) - suffix + extra].decode(
+                                                        'utf8').splitlines())
+
+    # a line removed from the region may still be elsewhere in the file:
+    # a few lines are searched for, many lines are checked in a single pass
+    removed = list(old_lines - new_lines)
+    if len(removed) > FEW_LINES:
+        content = set(new.decode('utf8').splitlines())
+        removed = [line for line in removed if line not in content]
+    elif removed:
+        content = b"\n" + new + b"\n"
+        removed = [line for line in removed
+                    if f"\n{line}\n".encode('utf8') not in content]
+    return removed, list(new_lines - old_lines)
+
+
+class WordsWatcher:
+    """Watches the words file and reports the entries added to and removed
+    from it since the last poll.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.mtime = os.stat(filename).st_mtime_ns
+        with open(filename, 'rb') as datafile:
+            self.content = datafile.read()
+
+
+    def poll(self) -> Optional[Tuple[List[Entry], List[Entry]]]:
+        """Checks if the words file was modified and, if it was, which
+        entries changed.
+
+        Returns:
+            entries removed and entries added, or None if the file was not
+                modified
+        """
+
+        try:
+            mtime = os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self.mtime:
+            return None
+
+        with open(self.filename, 'rb') as datafile:
+            content = datafile.read()
+        removed, added = diff_lines(self.content, content)
+        self.mtime, self.content = mtime, content
+        return ([entry for entry in map(parse_line, removed) if entry],
+                [entry for entry in map(parse_line, added) if entry])